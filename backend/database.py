@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 from models import Base, GroupDB, NodeDB, MetricDefinitionDB, NodeMetricDB
 import os
 
@@ -13,6 +13,15 @@ DB_PATH = os.getenv("DB_PATH", str(DEFAULT_DB_PATH))
 # Ensure directory exists
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
+# SQLAlchemy 2.0 caches compiled statements per engine (default 500 entries);
+# room for every hot SELECT keeps the polled read endpoints from recompiling
+QUERY_CACHE_SIZE = 1200
+
+# Upper bound on open connections: every sync endpoint worker thread (see API_WORKER_THREADS
+# in main.py) plus the monitor/collector sessions must get one without waiting on the pool
+DB_POOL_SIZE = 5
+DB_MAX_CONNECTIONS = 64
+
 
 
 
@@ -23,14 +32,32 @@ if os.getenv("TESTING"):
         SQLALCHEMY_DATABASE_URL,
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
+        query_cache_size=QUERY_CACHE_SIZE,
     )
 else:
     SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_CONNECTIONS - DB_POOL_SIZE,
+        pool_recycle=1800,
+        query_cache_size=QUERY_CACHE_SIZE,
     )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets API reads run alongside monitor writes instead of blocking on the journal lock
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+# Endpoints return the objects they just committed; without expiry, serializing them needs no re-SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
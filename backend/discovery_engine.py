@@ -3,18 +3,25 @@ import asyncio
 import logging
 import ipaddress
 import socket
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 from ping3 import ping
 from pysnmp.hlapi.asyncio import *
+from monitors.snmp_common import get_snmp_engine
 
 logger = logging.getLogger("BeamState.Discovery")
 
+@lru_cache(maxsize=1024)
+def parse_cidr(cidr: str):
+    """Parse a scan target (host bits allowed); raises ValueError if invalid. Cached per string."""
+    return ipaddress.ip_network(cidr, strict=False)
+
 class DiscoveryEngine:
     """Network discovery engine using ICMP and SNMP"""
     
     def __init__(self):
-        self.snmp_engine = SnmpEngine()
+        self.snmp_engine = get_snmp_engine()
         self._scan_running = False
         self._scan_results = []
         # Stats
@@ -47,7 +54,7 @@ class DiscoveryEngine:
         self._stats_found_snmp = 0
         
         try:
-            network = ipaddress.ip_network(cidr, strict=False)
+            network = parse_cidr(cidr)
             hosts = list(network.hosts())
             self._total_hosts = len(hosts)
             
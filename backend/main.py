@@ -4,6 +4,7 @@ import sys
 import logging
 import json
 import pathlib
+from typing import Optional
 
 # Load log level from config
 CONFIG_FILE = pathlib.Path(__file__).parent / "config.json"
@@ -35,20 +36,28 @@ if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
     logger.info("Using WindowsProactorEventLoopPolicy for IOCP support")
 from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
 from database import init_db, SessionLocal
 from monitor_manager import MonitorManager
+from storage import storage
 from routers import config
 from cleanup import sync_with_config
+from utils import flush_pending_config
 
 
 # Initialize Monitor Manager
 pinger = MonitorManager()
 
+# FastAPI runs every `def` endpoint on AnyIO's worker threads (40 by default, shared with
+# sync dependencies); a few slow requests shouldn't leave the rest queued behind them
+API_WORKER_THREADS = 48
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("BeamState Backend Starting...")
+    to_thread.current_default_thread_limiter().total_tokens = API_WORKER_THREADS
     init_db()
     
     # Run database migrations for new columns
@@ -58,6 +67,10 @@ async def lifespan(app: FastAPI):
         run_migrations()
         from migrations.schema_update_v2 import run_migrations as run_migrations_v2
         run_migrations_v2()
+        from migrations.schema_update_v3 import run_migrations as run_migrations_v3
+        run_migrations_v3()
+        from migrations.schema_update_v4 import run_migrations as run_migrations_v4
+        run_migrations_v4()
     except Exception as e:
         logger.warning(f"Database migration failed: {e}")
     
@@ -88,9 +101,14 @@ async def lifespan(app: FastAPI):
     pinger.stop()
     if not os.getenv("TESTING"):
         await ping_task
+    await pinger.pushover.aclose()
+    flush_pending_config()
+    await storage.close()
 
 app = FastAPI(title="BeamState API", lifespan=lifespan)
 app.state.pinger = pinger
+# Bound once so the polled current-values endpoints skip the per-request hasattr checks
+app.state.snmp_collector = getattr(pinger, "snmp_collector", None)
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -118,8 +136,8 @@ def read_root():
     return {"status": "online", "service": "BeamState"}
 
 @app.get("/status")
-def get_pinger_status():
-    return pinger.get_status()
+def get_pinger_status(skip: int = 0, limit: Optional[int] = None):
+    return pinger.get_status(skip, limit)
 
 if __name__ == "__main__":
     import uvicorn
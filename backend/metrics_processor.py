@@ -11,10 +11,42 @@ from notifications import PushoverClient
 
 logger = logging.getLogger("BeamState.MetricProcessor")
 
+# ifXTable high-capacity (Counter64) columns: ifHCIn*/ifHCOut* octets and packets
+HC_COUNTER_PREFIXES = tuple(f"1.3.6.1.2.1.31.1.1.1.{col}." for col in range(6, 14))
+
+
+def counter_bits(oid_template: Optional[str]) -> int:
+    """Width of the SNMP counter behind an OID: 64 for ifXTable HC columns, else 32"""
+    if oid_template and oid_template.startswith(HC_COUNTER_PREFIXES):
+        return 64
+    return 32
+
+
+# Counter masks and reset thresholds per width, computed once
+_COUNTER_MASK = {32: (1 << 32) - 1, 64: (1 << 64) - 1}
+_COUNTER_HALF = {32: 1 << 31, 64: 1 << 63}
+
+
+def compute_rate(cur_val: int, prev_val: int, time_delta: float, bits: int = 32) -> Optional[float]:
+    """
+    Per-second rate between two counter samples.
+    
+    Masked (modular) subtraction handles wrap-around: a wrapped counter still
+    yields the true positive delta. A delta above half the counter range means
+    the counter went backwards (device reboot / counter reset), not a wrap, and
+    yields None, as does a non-positive time delta.
+    """
+    if time_delta <= 0:
+        return None
+    val_delta = (cur_val - prev_val) & _COUNTER_MASK[bits]
+    if val_delta >= _COUNTER_HALF[bits]:
+        return None
+    return val_delta / time_delta
+
 class MetricProcessor:
     def __init__(self, pushover: PushoverClient):
         self.pushover = pushover
-        self.previous_values = {} # node_metric_id -> {'value': val, 'timestamp': ts}
+        self.previous_values = {} # node_metric_id -> (value, timestamp); a tuple is ~4x smaller than a dict
         
         # Concurrency lock for file operations
         self.state_lock = asyncio.Lock()
@@ -79,10 +111,12 @@ class MetricProcessor:
                 
         return status, offending_metric_id
 
-    async def process_metric(self, node: NodeDB, node_metric: NodeMetricDB, value: Any) -> Optional[dict]:
+    async def process_metric(self, node: NodeDB, node_metric: NodeMetricDB, value: Any, pending: Optional[list] = None) -> Optional[dict]:
         """
         Process a metric value: calculate rate (if needed), check thresholds, send alerts, and persist.
         Returns the processed entry (value, rate, timestamp) or None if invalid.
+        If `pending` is given, the storage write is appended to it (see Storage.write_snmp_metrics)
+        instead of being made here.
         """
         now = time.time()
         metric_def = node_metric.metric_definition
@@ -94,17 +128,18 @@ class MetricProcessor:
         processed_value = value
         rate = None
         
-        # Determine if we should treat as float/int
-        try:
-             float_val = float(value)
-             processed_value = float_val
-        except Exception as e:
-             # Keep as string/original if float conversion fails
-             # logger.debug(f"Float conversion failed for {value}: {e}")
-             pass
+        # Determine if we should treat as float/int (SNMP integer types arrive as int already)
+        if isinstance(value, (int, float)):
+             processed_value = float(value)
+        else:
+             try:
+                  processed_value = float(value)
+             except (ValueError, TypeError):
+                  # Keep as string/original if float conversion fails
+                  pass
 
         if metric_type == 'counter':
-            rate = self._calculate_rate(node_metric_id, value, now, unit)
+            rate = self._calculate_rate(node_metric_id, value, now, unit, counter_bits(metric_def.oid_template))
             if rate is None:
                 # First run or invalid delta
                 return None
@@ -120,16 +155,20 @@ class MetricProcessor:
              if metric_type == 'counter' and unit == 'bytes':
                  final_unit = 'bps'
              
-             await storage.write_snmp_metric(
-                 node_name=node.name,
-                 ip=node.ip,
-                 group_name=node.group.name if node.group else "global",
-                 metric_name=metric_def.name,
-                 value=processed_value,
-                 unit=final_unit,
-                 interface=node_metric.interface_name,
-                 metric_type=metric_type
-             )
+             if pending is not None:
+                 # Caller writes the node's collected metrics together
+                 pending.append((metric_def.name, processed_value, final_unit, node_metric.interface_name, metric_type))
+             else:
+                 await storage.write_snmp_metric(
+                     node_name=node.name,
+                     ip=node.ip,
+                     group_name=node.group.name if node.group else "global",
+                     metric_name=metric_def.name,
+                     value=processed_value,
+                     unit=final_unit,
+                     interface=node_metric.interface_name,
+                     metric_type=metric_type
+                 )
              
         return {
             "value": value,  # Raw value - frontend will format based on unit
@@ -138,39 +177,33 @@ class MetricProcessor:
             "processed_value": processed_value  # Used for alerting (rate for counters)
         }
 
-    def _calculate_rate(self, node_metric_id: str, current_value: Any, now: float, unit: str) -> Optional[float]:
-        try:
-            cur_val = float(current_value)
-        except (ValueError, TypeError):
-            return None
+    def _calculate_rate(self, node_metric_id: str, current_value: Any, now: float, unit: str, bits: int = 32) -> Optional[float]:
+        if isinstance(current_value, int):
+            cur_val = current_value
+        else:
+            try:
+                # Counters are integers; keep them exact (a float loses precision above 2^53)
+                cur_val = int(current_value)
+            except (ValueError, TypeError):
+                try:
+                    cur_val = int(float(current_value))
+                except (ValueError, TypeError, OverflowError):
+                    return None
 
         prev = self.previous_values.get(node_metric_id)
         
         # Update previous value store
-        self.previous_values[node_metric_id] = {
-            "value": cur_val,
-            "timestamp": now
-        }
+        self.previous_values[node_metric_id] = (cur_val, now)
 
-        if not prev:
+        if prev is None:
             return None
 
-        try:
-            prev_val = float(prev['value'])
-            time_delta = now - prev['timestamp']
+        prev_val, prev_ts = prev
+        rate = compute_rate(cur_val, prev_val, now - prev_ts, bits)
             
-            if time_delta > 0:
-                val_delta = cur_val - prev_val
-                # Handle Wrap-around or Reset (ignore negative delta)
-                if val_delta >= 0:
-                    rate = val_delta / time_delta
-                    if unit == 'bytes':
-                        rate = rate * 8  # Convert to bits/sec
-                    return rate
-        except Exception:
-            pass
-            
-        return None
+        if rate is not None and unit == 'bytes':
+            rate = rate * 8  # Convert to bits/sec
+        return rate
 
     async def _check_thresholds(self, node: NodeDB, node_metric: NodeMetricDB, value: float):
         """Check values against warning/critical thresholds and trigger alerts on state change"""
@@ -191,8 +224,7 @@ class MetricProcessor:
             return
 
         # Check global Pushover Enabled setting
-        pushover_config = storage.config.get("pushover", {})
-        if not pushover_config.get("enabled", False):
+        if not storage.get_pushover().enabled:
             return
 
         warning = node_metric.warning_threshold
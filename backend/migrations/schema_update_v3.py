@@ -0,0 +1,22 @@
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger("BeamState.MigrationV3")
+
+def run_migrations():
+    """Add indexes for the monitor/collector and per-node/per-group queries to existing databases"""
+    try:
+        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'beamstate.db')
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # create_all() only creates indexes together with new tables
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_nodes_enabled_snmp ON nodes (enabled, monitor_snmp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_nodes_group_id ON nodes (group_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_node_metrics_node_id ON node_metrics (node_id)")
+            
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.warning(f"Database migration v3 failed: {e}")
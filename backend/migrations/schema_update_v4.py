@@ -0,0 +1,28 @@
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger("BeamState.MigrationV4")
+
+def run_migrations():
+    """Make (node_id, index) unique on node_interfaces so discovery can upsert interfaces"""
+    try:
+        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'beamstate.db')
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'uq_node_interfaces_node_index'")
+        if cursor.fetchone() is None:
+            # Keep one row per (node_id, ifIndex) before the unique index can be built
+            cursor.execute(
+                'DELETE FROM node_interfaces WHERE rowid NOT IN '
+                '(SELECT MIN(rowid) FROM node_interfaces GROUP BY node_id, "index")'
+            )
+            cursor.execute("DROP INDEX IF EXISTS ix_node_interfaces_node_index")
+            cursor.execute('CREATE UNIQUE INDEX uq_node_interfaces_node_index ON node_interfaces (node_id, "index")')
+            logger.info("Migration: Made node_interfaces (node_id, index) unique")
+            
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.warning(f"Database migration v4 failed: {e}")
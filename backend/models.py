@@ -1,7 +1,7 @@
 import uuid
 from pydantic import BaseModel, field_validator
 from typing import Optional, List
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 import re
@@ -36,7 +36,7 @@ class NodeDB(Base):
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, index=True)
     ip = Column(String, index=True) # IPv4
-    group_id = Column(String, ForeignKey("groups.id"))
+    group_id = Column(String, ForeignKey("groups.id"), index=True)
     
     # Overrides (if null, use group default)
     interval = Column(Integer, nullable=True)
@@ -59,6 +59,11 @@ class NodeDB(Base):
     node_metrics = relationship("NodeMetricDB", back_populates="node", cascade="all, delete-orphan")
     interfaces = relationship("NodeInterfaceDB", back_populates="node", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # SNMP collector inventory query: enabled AND monitor_snmp
+        Index("ix_nodes_enabled_snmp", "enabled", "monitor_snmp"),
+    )
+
 class MetricDefinitionDB(Base):
     __tablename__ = "metric_definitions"
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
@@ -77,7 +82,7 @@ class MetricDefinitionDB(Base):
 class NodeMetricDB(Base):
     __tablename__ = "node_metrics"
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    node_id = Column(String, ForeignKey("nodes.id", ondelete="CASCADE"))
+    node_id = Column(String, ForeignKey("nodes.id", ondelete="CASCADE"), index=True)
     metric_definition_id = Column(String, ForeignKey("metric_definitions.id"))
     interface_index = Column(Integer, nullable=True)  # For per-interface metrics
     interface_name = Column(String, nullable=True)  # e.g., "eth0", "port1"
@@ -109,6 +114,11 @@ class NodeInterfaceDB(Base):
     
     node = relationship("NodeDB", back_populates="interfaces")
 
+    __table_args__ = (
+        # Interface listing by node, ordered by ifIndex; unique so discovery can upsert on it
+        Index("uq_node_interfaces_node_index", "node_id", "index", unique=True),
+    )
+
 # Pydantic Models (API)
 class NodeBase(BaseModel):
     name: str
@@ -1,11 +1,15 @@
 import asyncio
+import heapq
 import logging
 import time
-from typing import Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import selectinload
 from database import SessionLocal
 from models import NodeDB, GroupDB
 from storage import storage
-from monitors import PingMonitor, SNMPMonitor, MonitorResult
+from monitors import PingMonitor, SNMPMonitor, MonitorResult, EMPTY_RAW_DATA
 from monitors.snmp_data_collector import SNMPDataCollector
 from notifications import PushoverClient
 from metrics_processor import MetricProcessor
@@ -14,15 +18,127 @@ from trace_manager import trace_manager, TraceEvent
 
 logger = logging.getLogger("BeamState.MonitorManager")
 
+# Built-in ICMP metric definitions (see seed_metrics.py)
+ICMP_LATENCY = "ICMP Latency"
+ICMP_PACKET_LOSS = "ICMP Packet Loss"
+
+# Fallback reload interval for the node cache; API changes mark it dirty immediately
+NODE_CACHE_REFRESH = 300
+
+# Pending monitor results kept while storage is slow (oldest are dropped beyond this)
+STORAGE_QUEUE_SIZE = 10000
+# Most results handed to storage in one write
+STORAGE_BATCH_SIZE = 500
+
+
+@dataclass(slots=True)
+class NodeState:
+    """Mutable health-check state of one node"""
+    status: str = "UP"
+    failure_count: int = 0
+    first_failure_time: float = 0
+
+
+@dataclass(slots=True, frozen=True)
+class EffectiveConfig:
+    """Node settings with group defaults already applied"""
+    interval: int
+    pending_interval: float  # retry interval while PENDING (1/3 of heartbeat)
+    packet_count: int
+    max_retries: int
+    use_ping: bool
+    use_snmp: bool
+    community: str
+    port: int
+    group_name: str
+    group_enabled: bool
+    icmp_metrics: Tuple[Tuple[NodeMetricDB, bool], ...]  # (enabled ICMP metric, is_latency) - else packet loss
+
+    @classmethod
+    def from_node(cls, node: NodeDB) -> "EffectiveConfig":
+        group = node.group
+        interval = node.interval if node.interval is not None else group.interval
+        return cls(
+            interval=interval,
+            pending_interval=interval / 3,
+            packet_count=node.packet_count if node.packet_count is not None else group.packet_count,
+            max_retries=node.max_retries if node.max_retries is not None else group.max_retries,
+            use_ping=node.monitor_ping if node.monitor_ping is not None else group.monitor_ping,
+            use_snmp=node.monitor_snmp if node.monitor_snmp is not None else group.monitor_snmp,
+            community=node.snmp_community or group.snmp_community,
+            port=node.snmp_port or group.snmp_port,
+            group_name=group.name,
+            group_enabled=group.enabled,
+            icmp_metrics=tuple(
+                (nm, nm.metric_definition.name == ICMP_LATENCY)
+                for nm in node.node_metrics
+                if nm.enabled and nm.metric_definition
+                and nm.metric_definition.metric_source == "icmp"
+                and nm.metric_definition.name in (ICMP_LATENCY, ICMP_PACKET_LOSS)
+            )
+        )
+
+
+def next_status(current_status: str, reachable: bool, metric_status: str,
+                failure_count: int, max_retries: int) -> Tuple[str, int]:
+    """
+    Pure node state machine step.
+    
+    Args:
+        current_status: UP, PENDING, DOWN or PAUSED
+        reachable: True if all configured monitors succeeded
+        metric_status: Aggregated metric alert status (UP, PENDING or DOWN), only used when reachable
+        failure_count: Consecutive failed checks so far
+        max_retries: Retries allowed in PENDING before marking DOWN
+        
+    Returns:
+        Tuple of (new_status, new_failure_count)
+    """
+    if reachable:
+        # Reachability OK resets the retry counter; metric alerts can still degrade the status
+        if metric_status in ("DOWN", "PENDING"):
+            return metric_status, 0
+        return "UP", 0
+    
+    if current_status == "UP":
+        return "PENDING", 1
+    if current_status == "PENDING":
+        failure_count += 1
+        return ("DOWN" if failure_count > max_retries else "PENDING"), failure_count
+    # DOWN stays DOWN (and PAUSED is only left via an explicit unpause)
+    return current_status, failure_count
+
+
 class MonitorManager:
     def __init__(self):
         self.running = False
-        self.last_ping_time: Dict[int, float] = {} # node_id -> timestamp
+        self.last_ping_time: Dict[int, float] = {} # node_id -> time.monotonic() of last check (0 = check now)
         self.latest_results: Dict[int, dict] = {} # node_id -> {status, latency, packet_loss, timestamp}
-        self.node_states: Dict[int, dict] = {} # node_id -> {status, failure_count, first_failure_time}
+        self._status_list: Optional[List[dict]] = None # latest_results values for get_status (None = rebuild)
+        self.node_states: Dict[int, NodeState] = {} # node_id -> status, failure_count, first_failure_time
+        self.effective_configs: Dict[int, EffectiveConfig] = {} # node_id -> resolved settings (see invalidate_nodes)
+        
+        # Number of check workers (concurrency limit for Windows SelectorEventLoop 64 FD limit)
+        self.concurrency = 32
+        # Nodes queued for checking this tick, consumed by the check workers
+        self.check_queue: asyncio.Queue = asyncio.Queue()
+        self._check_tasks: List[asyncio.Task] = []
+        
+        # Monitored nodes, reloaded from the DB only after a config change
+        # (invalidate_nodes / remove_node, called from the routers) or every NODE_CACHE_REFRESH
+        self._nodes_cache: Dict[str, NodeDB] = {}
+        self._nodes_dirty = True
+        self._nodes_loaded_at = 0.0
         
-        # Concurrency limit for Windows (SelectorEventLoop 64 FD limit)
-        self.semaphore = asyncio.Semaphore(32)
+        # Check schedule: min-heap of (due monotonic ts, node_id). _due_at holds each node's
+        # current due time; heap entries that no longer match it are stale and skipped.
+        self._due_heap: List[Tuple[float, str]] = []
+        self._due_at: Dict[str, float] = {}
+        # Immediate-check requests from router threads, drained by run_loop
+        self._immediate: Deque[str] = deque()
+        # Wakes run_loop early (config change, immediate check, stop)
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
         # Initialize monitors
         self.ping_monitor = PingMonitor()
@@ -30,192 +146,250 @@ class MonitorManager:
         self.snmp_collector = SNMPDataCollector()
         
         # Configure Pushover
-        pushover_conf = storage.config.get("pushover", {})
+        pushover_conf = storage.get_pushover()
         self.pushover = PushoverClient(
-            token=pushover_conf.get("token"),
-            user_key=pushover_conf.get("user_key")
+            token=pushover_conf.token,
+            user_key=pushover_conf.user_key
         )
         self.metric_processor = MetricProcessor(self.pushover)
         
         # Inject processor into collector
         self.snmp_collector.set_processor(self.metric_processor)
         
+        # DOWN alerts are queued and sent by a single worker so the monitor loop never waits on Pushover
+        self.notify_queue: asyncio.Queue = asyncio.Queue()
+        self._notify_task: Optional[asyncio.Task] = None
+        
+        # Monitor results are written by a separate worker so slow storage never delays the next checks
+        self.storage_queue: asyncio.Queue = asyncio.Queue(maxsize=STORAGE_QUEUE_SIZE)
+        self._storage_task: Optional[asyncio.Task] = None
+        
         # Throttling state
-        self.alert_history: List[float] = [] # timestamps of recent alerts
-        self.last_storm_alert_time = 0
+        self.alert_history: Deque[float] = deque() # timestamps of recent alerts (oldest first)
+        self.last_storm_alert_time: Optional[float] = None # time.monotonic()
 
 
 
 
     def remove_node(self, node_id: int):
-        if node_id in self.latest_results:
-            del self.latest_results[node_id]
-        if node_id in self.last_ping_time:
-            del self.last_ping_time[node_id]
+        if self.latest_results.pop(node_id, None) is not None:
+            self._status_list = None
+        self.last_ping_time.pop(node_id, None)
         # Clear failure tracking
         self.node_states.pop(node_id, None)
+        # Its heap entry is skipped once it has no due time (lazy delete, no heap rebuild)
+        self._due_at.pop(node_id, None)
+        self.effective_configs.pop(node_id, None)
+        self.snmp_collector.forget_node(node_id)
+        self._nodes_dirty = True
+        self._wake_loop()
+        self.snmp_collector.invalidate_inventory()
         logger.info(f"Removed node {node_id} from monitor cache")
 
-    def get_node_state(self, node_id: int) -> dict:
-        if node_id not in self.node_states:
-            self.node_states[node_id] = {
-                "status": "UP",
-                "failure_count": 0,
-                "first_failure_time": 0
-            }
-        return self.node_states[node_id]
+    def invalidate_nodes(self, node_ids: Optional[List[str]] = None):
+        """Drop cached effective settings after a config change (all nodes if no IDs given)"""
+        self._nodes_dirty = True
+        self._wake_loop()
+        self.snmp_collector.invalidate_inventory()
+        if node_ids is None:
+            self.effective_configs.clear()
+        else:
+            for node_id in node_ids:
+                self.effective_configs.pop(node_id, None)
+
+    def reload_group(self, group_id: str):
+        """Drop cached settings for a group's nodes after its defaults changed"""
+        self.invalidate_nodes([
+            node_id for node_id, node in self._nodes_cache.items()
+            if node.group_id == group_id
+        ])
+
+    def get_effective_config(self, node: NodeDB) -> EffectiveConfig:
+        cfg = self.effective_configs.get(node.id)
+        if cfg is None:
+            cfg = EffectiveConfig.from_node(node)
+            self.effective_configs[node.id] = cfg
+        return cfg
+
+    def get_node_state(self, node_id: int) -> NodeState:
+        state = self.node_states.get(node_id)
+        if state is None:
+            state = self.node_states[node_id] = NodeState()
+        return state
     
     def trigger_immediate_check(self, node_id: str):
         """Trigger an immediate check for a specific node (e.g., when unpausing)"""
-        if node_id in self.last_ping_time:
-            # Reset the last ping time to 0 to force immediate check on next loop iteration
+        self.trigger_immediate_check_many([node_id])
+
+    def trigger_immediate_check_many(self, node_ids: List[str]):
+        """Trigger immediate checks for several nodes with a single wake-up of the monitor loop"""
+        for node_id in node_ids:
+            # Reset (or add) the last ping time to 0 so the node counts as never checked
             self.last_ping_time[node_id] = 0
-            logger.info(f"Triggered immediate check for node {node_id}")
+        self._immediate.extend(node_ids)
+        self._wake_loop()
+        if len(node_ids) == 1:
+            logger.info(f"Triggered immediate check for node {node_ids[0]}")
         else:
-            # If not in cache, add it with 0 so it runs immediately
-            self.last_ping_time[node_id] = 0
-            logger.info(f"Node {node_id} not in ping cache, added for immediate check")
+            logger.info(f"Triggered immediate checks for {len(node_ids)} nodes")
+
+    def _update_latest(self, node: NodeDB, group_name: str, **fields):
+        """Update the cached result for a node in place (identity fields only change on rename/move)"""
+        entry = self.latest_results.get(node.id)
+        if entry is None:
+            entry = self.latest_results[node.id] = {
+                "node_id": node.id,
+                "node_name": node.name,
+                "ip": node.ip,
+                "group_name": group_name
+            }
+            self._status_list = None
+        elif entry.get("node_name") != node.name or entry.get("ip") != node.ip or entry.get("group_name") != group_name:
+            entry.update(node_name=node.name, ip=node.ip, group_name=group_name)
+        entry.update(fields)
+
     def set_paused(self, node: NodeDB):
         """Immediately force a node's status to PAUSED in the cache"""
         now = time.time()
-        self.latest_results[node.id] = {
-            "node_id": node.id,
-            "node_name": node.name,
-            "ip": node.ip,
-            "group_name": node.group.name if node.group else "Unknown",
-            "status": "PAUSED",
-            "latency": None,
-            "packet_loss": 0,
-            "timestamp": now,
-            "monitor_ping": False,
-            "monitor_snmp": False
-        }
+        self._update_latest(
+            node,
+            node.group.name if node.group else "Unknown",
+            status="PAUSED",
+            latency=None,
+            packet_loss=0,
+            timestamp=now,
+            monitor_ping=False,
+            monitor_snmp=False
+        )
         # Also clear any failure state so it doesn't resume as PENDING/DOWN later
-        if node.id in self.node_states:
-            self.node_states[node.id]["status"] = "PAUSED"
-            self.node_states[node.id]["failure_count"] = 0
+        state = self.node_states.get(node.id)
+        if state is not None:
+            state.status = "PAUSED"
+            state.failure_count = 0
             
         logger.info(f"Node {node.name} status forced to PAUSED")
 
-    async def process_node_with_limit(self, node: NodeDB):
-        """Process a node with semaphore to limit concurrent sockets"""
-        async with self.semaphore:
-            await self.process_node(node)
+    async def _check_worker(self):
+        """Process queued nodes one at a time; concurrency is the number of workers"""
+        while True:
+            node = await self.check_queue.get()
+            try:
+                await self.process_node(node)
+            except Exception as e:
+                logger.error(f"Error processing node {node.name}: {e}")
+            finally:
+                self.check_queue.task_done()
 
     async def process_node(self, node: NodeDB):
         """Process a single node with configured monitoring protocols"""
-        now = time.time()
+        # Monotonic clock for scheduling (immune to NTP jumps), wall clock for reported timestamps
+        now = time.monotonic()
+        now_wall = time.time()
         last = self.last_ping_time.get(node.id, 0)
         
         # Check if node has a group
         if node.group is None:
             logger.warning(f"Node {node.name} ({node.id}) is an orphan (no group). Skipping.")
+            # Stamp it anyway so the scheduler does not treat it as never checked
+            self.last_ping_time[node.id] = now
             return
         
         # Get node settings
-        interval = node.interval if node.interval is not None else node.group.interval
-        packet_count = node.packet_count if node.packet_count is not None else node.group.packet_count
-        max_retries = node.max_retries if node.max_retries is not None else node.group.max_retries
+        cfg = self.get_effective_config(node)
+        max_retries = cfg.max_retries
         
         # Get current state
         state = self.get_node_state(node.id)
-        current_status = state["status"]
+        current_status = state.status
         
         # Determine effective interval based on status
-        effective_interval = interval
-        if current_status == "PENDING":
-             # Retry interval is 1/3 of heartbeat
-             effective_interval = interval / 3
+        effective_interval = cfg.pending_interval if current_status == "PENDING" else cfg.interval
 
-        # Determine if due
-        if now - last < effective_interval:
+        # Determine if due (0 means never checked or an immediate check was requested)
+        if last and now - last < effective_interval:
             return
         
         self.last_ping_time[node.id] = now
 
         # Skip monitoring if node or group is disabled (PAUSED)
         # BUT write a PAUSED record to storage to ensure alerts clear (status_code=1)
-        if not node.enabled or not node.group.enabled:
+        if not node.enabled or not cfg.group_enabled:
             # Update cache
-            self.latest_results[node.id] = {
-                "node_id": node.id,
-                "node_name": node.name,
-                "ip": node.ip,
-                "group_name": node.group.name,
-                "status": "PAUSED",
-                "latency": None,
-                "packet_loss": 0,
-                "timestamp": now,
-                "monitor_ping": False,
-                "monitor_snmp": False
-            }
+            self._update_latest(
+                node,
+                cfg.group_name,
+                status="PAUSED",
+                latency=None,
+                packet_loss=0,
+                timestamp=now_wall,
+                monitor_ping=False,
+                monitor_snmp=False
+            )
             # Write 'PAUSED' to storage to clear any stale DOWN alerts
             # We use a dummy protocol 'system' or just 'icmp' to ensure it appears in the same query
-            await storage.write_monitor_result(
+            self._queue_result(dict(
                 node_name=node.name,
                 ip=node.ip,
-                group_name=node.group.name,
+                group_name=cfg.group_name,
                 protocol="icmp", # Use icmp so it shows up in main status query
                 latency=0.0,
                 status="PAUSED",
                 success=True, # Treated as success to be safe
-                raw_data={}
-            )
+                raw_data=EMPTY_RAW_DATA
+            ))
             return
         
         # Determine monitoring configuration
-        use_ping = node.monitor_ping if node.monitor_ping is not None else node.group.monitor_ping
-        use_snmp = node.monitor_snmp if node.monitor_snmp is not None else node.group.monitor_snmp
-        
-        # Get node settings (re-fetch to be safe/clear, though we fetched earlier)
-        # interval/packet_count are already fetched at top of function but we can reuse or just use what we have.
-        # Actually, looking at code above, I already fetched 'interval', 'packet_count', 'max_retries' at lines 68-71.
-        # So I only need to define use_ping and use_snmp.
+        use_ping = cfg.use_ping
+        use_snmp = cfg.use_snmp
         
         # Run configured monitors
         monitor_results: List[MonitorResult] = []
         
         if use_ping:
             logger.debug(f"Running PING monitor for {node.name} ({node.ip})")
-            ping_result = await self.ping_monitor.check(node.ip, count=packet_count, timeout=5)
+            ping_result = await self.ping_monitor.check(node.ip, count=cfg.packet_count, timeout=5)
             monitor_results.append(ping_result)
         
         if use_snmp:
             logger.debug(f"Running SNMP monitor for {node.name} ({node.ip})")
-            community = node.snmp_community or node.group.snmp_community
-            port = node.snmp_port or node.group.snmp_port
-            snmp_result = await self.snmp_monitor.check(node.ip, community=community, port=port, timeout=5)
+            snmp_result = await self.snmp_monitor.check(node.ip, community=cfg.community, port=cfg.port, timeout=5)
             monitor_results.append(snmp_result)
         
-        # Aggregate results: node is UP only if ALL configured monitors succeed
-        overall_success = all(r.success for r in monitor_results) if monitor_results else False
-        
-        # Calculate average latency from successful ICMP monitors only
-        successful_latencies = [r.latency_ms for r in monitor_results if r.protocol == "icmp" and r.success and r.latency_ms is not None]
-        avg_latency = sum(successful_latencies) / len(successful_latencies) if successful_latencies else None
-        
-        # Determine packet loss (only relevant for PING)
-        packet_loss = 0.0
-        for result in monitor_results:
-            if result.protocol == "icmp":
-                packet_loss = result.raw_data.get("packet_loss", 0.0)
-                break
+        # Aggregate results in a single pass:
+        # - node is UP only if ALL configured monitors succeed
+        # - average latency from successful ICMP monitors only
+        # - packet loss from the (first) ICMP monitor
+        overall_success = bool(monitor_results)
+        latency_total = 0.0
+        latency_count = 0
+        packet_loss = None
+        for r in monitor_results:
+            if not r.success:
+                overall_success = False
+            if r.protocol == "icmp":
+                if r.success and r.latency_ms is not None:
+                    latency_total += r.latency_ms
+                    latency_count += 1
+                if packet_loss is None:
+                    packet_loss = r.raw_data.get("packet_loss", 0.0)
+        avg_latency = latency_total / latency_count if latency_count else None
+        if packet_loss is None:
+            packet_loss = 0.0
         
         # Update state based on aggregated result
-        new_status = current_status
-        
+        metric_status, offending_metric_id = "UP", None
         if overall_success:
-            # Success (Ping/SNMP reachability OK)
-            new_status = "UP"
-            
-            # Check if metric alerts override status
             # Check if metric alerts override status
             metric_status, offending_metric_id = self.metric_processor.get_node_alert_status(node)
-            if metric_status == "DOWN":
-                new_status = "DOWN"
-            elif metric_status == "PENDING":
-                 new_status = "PENDING"
-            
+        
+        new_status, state.failure_count = next_status(
+            current_status, overall_success, metric_status, state.failure_count, max_retries
+        )
+        
+        # Side effects of the transition (logging, trace events, alerts)
+        if overall_success:
+            # Success (Ping/SNMP reachability OK)
             if current_status != new_status:
                 logger.info(f"Node {node.name} status changed: {current_status} -> {new_status} (Reachability: OK, Metric Alert: {metric_status})")
                 
@@ -226,7 +400,7 @@ class MonitorManager:
                     if offending_metric_id:
                         metric = next((m for m in node.node_metrics if m.id == offending_metric_id), None)
                         if metric:
-                            current_data = self.snmp_collector.current_values.get(offending_metric_id)
+                            current_data = self.snmp_collector.get_current_value(node.id, offending_metric_id)
                             if current_data:
                                 val = current_data.get("processed_value")
                                 if isinstance(val, (int, float)):
@@ -244,39 +418,34 @@ class MonitorManager:
                     node_id=node.id,
                     node_name=node.name,
                     ip=node.ip,
-                    group_name=node.group.name,
+                    group_name=cfg.group_name,
                     old_status=current_status,
                     new_status=new_status,
                     reason=reason
                 )))
                 
-            state["failure_count"] = 0 # Reset failure count for reachability
-            state["first_failure_time"] = 0
+            state.first_failure_time = 0
         else:
             # Failure
             if current_status == "UP":
                 # Transition to PENDING
-                new_status = "PENDING"
-                state["failure_count"] = 1
                 # Emit trace event for UP -> PENDING
                 asyncio.create_task(trace_manager.emit(TraceEvent(
                     timestamp=time.time(),
                     node_id=node.id,
                     node_name=node.name,
                     ip=node.ip,
-                    group_name=node.group.name,
+                    group_name=cfg.group_name,
                     old_status=current_status,
                     new_status=new_status,
                     reason="Check failed, entering retry state"
                 )))
-                state["first_failure_time"] = now
+                state.first_failure_time = now
                 logger.warning(f"Node {node.name} check failed. Entering PENDING state (Retry 1/{max_retries})")
             elif current_status == "PENDING":
-                state["failure_count"] += 1
-                logger.warning(f"Node {node.name} retry failed ({state['failure_count']}/{max_retries})")
-                if state["failure_count"] > max_retries:
+                logger.warning(f"Node {node.name} retry failed ({state.failure_count}/{max_retries})")
+                if new_status == "DOWN":
                     # Transition to DOWN
-                    new_status = "DOWN"
                     logger.error(f"Node {node.name} exceeded max retries. Marking DOWN.")
                     # Emit trace event for PENDING -> DOWN
                     asyncio.create_task(trace_manager.emit(TraceEvent(
@@ -284,20 +453,17 @@ class MonitorManager:
                         node_id=node.id,
                         node_name=node.name,
                         ip=node.ip,
-                        group_name=node.group.name,
+                        group_name=cfg.group_name,
                         old_status="PENDING",
                         new_status="DOWN",
                         reason=f"Exceeded max retries ({max_retries})"
                     )))
                     
-                    # Trigger Notification
-                    asyncio.create_task(self._send_down_alert(node))
-            elif current_status == "DOWN":
-                # Stay DOWN
-                new_status = "DOWN"
+                    # Trigger Notification (handled by the notification worker)
+                    self.notify_queue.put_nowait(node)
         
         # Update state
-        state["status"] = new_status
+        state.status = new_status
         
         # Log result at DEBUG level (use INFO for warnings/errors)
         lat_str = f"{avg_latency:.2f}ms" if avg_latency is not None else "N/A"
@@ -305,69 +471,102 @@ class MonitorManager:
         logger.debug(f"Result for {node.name} ({'/'.join(protocols)}): {new_status}, Latency: {lat_str}, Loss: {packet_loss}%")
         
         # Store latest result
-        self.latest_results[node.id] = {
-            "node_id": node.id,
-            "node_name": node.name,
-            "ip": node.ip,
-            "group_name": node.group.name,
-            "status": new_status,
-            "latency": avg_latency,
-            "packet_loss": packet_loss,
-            "timestamp": now,
-            "monitor_ping": use_ping,
-            "monitor_snmp": use_snmp
-        }
+        self._update_latest(
+            node,
+            cfg.group_name,
+            status=new_status,
+            latency=avg_latency,
+            packet_loss=packet_loss,
+            timestamp=now_wall,
+            monitor_ping=use_ping,
+            monitor_snmp=use_snmp
+        )
         
         # Write to Storage (log each monitor result separately)
-        for result in monitor_results:
+        for mr in monitor_results:
             # Determine status for this specific protocol check
             # Use Node status if it's PENDING (to show retry state), otherwise purely based on success
             if new_status == "PENDING":
                 record_status = "PENDING"
             else:
-                record_status = "UP" if result.success else "DOWN"
+                record_status = "UP" if mr.success else "DOWN"
 
-            await storage.write_monitor_result(
+            self._queue_result(dict(
                 node_name=node.name,
                 ip=node.ip,
-                group_name=node.group.name,
-                protocol=result.protocol,
-                latency=result.latency_ms,
+                group_name=cfg.group_name,
+                protocol=mr.protocol,
+                latency=mr.latency_ms,
                 status=record_status,
-                success=result.success,
-                raw_data=result.raw_data
-            )
+                success=mr.success,
+                raw_data=mr.raw_data
+            ))
             
             # --- NEW: Process generic generic metrics for alerting (ICMP) ---
-            if result.protocol == "icmp" and result.success:
-                # We need to find the NodeMetricDB entries for this node's ICMP metrics
-                # Since we are in an async method and db session is closed (it was passed in process_node? No, process_node uses DB via run_loop passing it?
-                # Wait, process_node takes 'node' which is attached to a session?
-                # 'node' comes from run_loop -> db.query(). So it is attached.
-                # But be careful about lazy loading if session is closed? 
-                # run_loop keeps session open while awaiting tasks.
-                
-                # We can access node.node_metrics
-                for nm in node.node_metrics:
-                    if not nm.enabled: continue
-                    definition = nm.metric_definition
-                    if not definition: continue
-                    if definition.metric_source != "icmp": continue
-                    
-                    val = None
-                    if definition.name == "ICMP Latency" and result.latency_ms is not None:
-                         val = result.latency_ms
-                    elif definition.name == "ICMP Packet Loss":
-                         val = result.raw_data.get("packet_loss", 0.0)
+            if mr.protocol == "icmp" and mr.success:
+                # ICMP metric bindings are resolved when the effective config is built
+                for nm, is_latency in cfg.icmp_metrics:
+                    if is_latency:
+                        val = mr.latency_ms
+                    else:
+                        val = mr.raw_data.get("packet_loss", 0.0)
                          
                     if val is not None:
                          try:
-                             result = await self.metric_processor.process_metric(node, nm, val)
+                             mp_result = await self.metric_processor.process_metric(node, nm, val)
                              # Store in shared cache for UI access
-                             if result:
-                                 self.snmp_collector.current_values[nm.id] = result
+                             if mp_result:
+                                 self.snmp_collector.set_current_value(node.id, nm.id, mp_result)
                          except Exception as ex:
-                             logger.error(f"Error processing ICMP metric {definition.name}: {ex}")
+                             logger.error(f"Error processing ICMP metric {nm.metric_definition.name}: {ex}")
+
+    def reload_nodes(self):
+        """Reload the node cache from the DB"""
+        # Clear first: a change committed while we query marks the cache dirty again
+        self._nodes_dirty = False
+        self._nodes_loaded_at = time.monotonic()
+        db = SessionLocal()
+        try:
+            # Eager-load everything process_node touches so it never lazy-loads per node;
+            # workers use the detached objects after the session is closed
+            nodes = db.query(NodeDB).options(
+                selectinload(NodeDB.group),
+                selectinload(NodeDB.node_metrics).selectinload(NodeMetricDB.metric_definition)
+            ).all()
+        except Exception:
+            self._nodes_dirty = True
+            raise
+        finally:
+            db.close()
+        
+        self._nodes_cache = {node.id: node for node in nodes}
+        # Settings may have changed, so rebuild them from the fresh objects and recompute every due time
+        self.effective_configs.clear()
+        self._due_at = {node.id: self._next_due(node) for node in nodes}
+        self._due_heap = [(due, node_id) for node_id, due in self._due_at.items()]
+        heapq.heapify(self._due_heap)
+
+    def _next_due(self, node: NodeDB) -> float:
+        """Monotonic time the node is next due, from its last check and current status"""
+        last = self.last_ping_time.get(node.id, 0)
+        if node.group is None:
+            # Orphans are skipped by process_node; look again at the next reload
+            return last + NODE_CACHE_REFRESH
+        if not last:
+            return 0.0
+        cfg = self.get_effective_config(node)
+        if self.get_node_state(node.id).status == "PENDING":
+            return last + cfg.pending_interval
+        return last + cfg.interval
+
+    def _schedule(self, node_id: str, due: float):
+        self._due_at[node_id] = due
+        heapq.heappush(self._due_heap, (due, node_id))
+
+    def _wake_loop(self):
+        """Wake run_loop early; safe to call from router threads"""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._wake.set)
 
     async def run_loop(self):
         self.running = True
@@ -377,61 +576,153 @@ class MonitorManager:
         # Start SNMP Collector
         await self.snmp_collector.start()
         
+        # Start notification worker
+        self._notify_task = asyncio.create_task(self._notify_worker())
+        
+        # Start storage writer
+        self._storage_task = asyncio.create_task(self._storage_worker())
+        
+        # Fixed pool of check workers instead of a coroutine per node per tick
+        self._check_tasks = [asyncio.create_task(self._check_worker()) for _ in range(self.concurrency)]
+        self._loop = asyncio.get_running_loop()
+        
         while self.running:
-            db = SessionLocal()
             try:
-                nodes = db.query(NodeDB).all()
-                # Process nodes concurrently
-                tasks = [self.process_node_with_limit(n) for n in nodes]
-                if tasks:
-                    await asyncio.gather(*tasks)
+                if self._nodes_dirty or time.monotonic() - self._nodes_loaded_at > NODE_CACHE_REFRESH:
+                    self.reload_nodes()
+                
+                while self._immediate:
+                    node_id = self._immediate.popleft()
+                    if node_id in self._nodes_cache:
+                        self._schedule(node_id, 0.0)
+                
+                # Pop every node that is due
+                now = time.monotonic()
+                due_nodes = []
+                while self._due_heap and self._due_heap[0][0] <= now:
+                    due, node_id = heapq.heappop(self._due_heap)
+                    if self._due_at.get(node_id) != due:
+                        continue  # superseded by a later reschedule
+                    del self._due_at[node_id]
+                    due_nodes.append(self._nodes_cache[node_id])
+                
+                if due_nodes:
+                    for node in due_nodes:
+                        self.check_queue.put_nowait(node)
+                    # Wait for these checks so a slow node is never queued twice
+                    await self.check_queue.join()
+                    # Next due time depends on the outcome (PENDING retries sooner).
+                    # A reload during the checks may have replaced or removed the node objects.
+                    for node in due_nodes:
+                        node = self._nodes_cache.get(node.id)
+                        if node is not None and node.id not in self._due_at:
+                            self._schedule(node.id, self._next_due(node))
+                    continue
+                
+                # Sleep until the next node is due (or a config change / immediate check wakes us)
+                timeout = NODE_CACHE_REFRESH
+                if self._due_heap:
+                    timeout = min(timeout, self._due_heap[0][0] - now)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
             except Exception as e:
                 logger.error(f"Error in Monitor Loop: {e}")
-            finally:
-                db.close()
-            
-            # Sleep to prevent busy loop
-            await asyncio.sleep(1)
+                await asyncio.sleep(1)
+        
+        for task in self._check_tasks:
+            task.cancel()
+        
+        # Flush pending results before shutting the writer down
+        await self.storage_queue.join()
+        self._storage_task.cancel()
 
     def stop(self):
         self.running = False
+        self._wake_loop()
         self.snmp_collector.stop()
+        if self._notify_task:
+            self._notify_task.cancel()
         logger.info("Stopping Monitor Loop...")
 
-    def get_status(self):
+    def get_status(self, skip: int = 0, limit: Optional[int] = None):
+        # Entries are updated in place, so the list only needs rebuilding when nodes come or go.
+        # A fresh list is built each time rather than mutated, so readers in API threads never see it change.
+        if self._status_list is None:
+            self._status_list = list(self.latest_results.values())
+        results = self._status_list
+        if skip or limit is not None:
+            results = results[skip:skip + limit if limit is not None else None]
         return {
             "running": self.running,
-            "monitored_devices": len(self.last_ping_time),
-            "latest_results": list(self.latest_results.values())
+            "monitored_devices": len(self._nodes_cache),
+            "latest_results": results
         }
 
+    async def _notify_worker(self):
+        """Drain the notification queue one alert at a time"""
+        while True:
+            node = await self.notify_queue.get()
+            try:
+                await self._send_down_alert(node)
+            finally:
+                self.notify_queue.task_done()
+
+    def _queue_result(self, record: dict):
+        """Queue a monitor result for the storage worker, dropping the oldest one if it is backed up"""
+        # Stamp now: the worker may write it a little later
+        record["timestamp"] = time.time()
+        try:
+            self.storage_queue.put_nowait(record)
+        except asyncio.QueueFull:
+            dropped = self.storage_queue.get_nowait()
+            self.storage_queue.task_done()
+            self.storage_queue.put_nowait(record)
+            logger.warning(f"Storage queue full, dropped result for {dropped.get('node_name')}")
+
+    async def _storage_worker(self):
+        """Write queued monitor results to storage in arrival order, batching whatever has piled up"""
+        while True:
+            batch = [await self.storage_queue.get()]
+            while len(batch) < STORAGE_BATCH_SIZE and not self.storage_queue.empty():
+                batch.append(self.storage_queue.get_nowait())
+            try:
+                await storage.write_monitor_results(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} monitor results: {e}")
+            finally:
+                for _ in batch:
+                    self.storage_queue.task_done()
+
     async def _send_down_alert(self, node: NodeDB):
         """Send notification for DOWN node"""
         try:
-            pushover_config = storage.config.get("pushover", {})
-            if not pushover_config.get("enabled", False):
+            pushover_config = storage.get_pushover()
+            if not pushover_config.enabled:
                 logger.debug("Pushover disabled in config. Skipping alert.")
                 return
 
             # Check maintenance mode
-            m_mode = pushover_config.get("maintenance_mode", False)
+            m_mode = pushover_config.maintenance_mode
             
             if m_mode:
                 logger.warning(f"Maintenance Mode Active: Suppressing alert for {node.name}")
                 return
             
-            logger.debug(f"Pushover Config Check: keys={list(pushover_config.keys())}, maintenance_mode={m_mode}")
+            logger.debug(f"Pushover Config Check: {pushover_config._replace(token='***', user_key='***')}")
 
 
             # --- Throttling Logic ---
-            throttling_enabled = pushover_config.get("throttling_enabled", False)
-            if throttling_enabled:
-                threshold = int(pushover_config.get("alert_threshold", 5))
-                window = int(pushover_config.get("alert_window", 60))
-                now = time.time()
+            if pushover_config.throttling_enabled:
+                threshold = pushover_config.alert_threshold
+                window = pushover_config.alert_window
+                now = time.monotonic()
                 
-                # Prune history
-                self.alert_history = [t for t in self.alert_history if now - t < window]
+                # Prune history (timestamps are appended in order, so stale entries sit at the head)
+                while self.alert_history and now - self.alert_history[0] >= window:
+                    self.alert_history.popleft()
                 
                 logger.info(f"Throttling Check: History={len(self.alert_history)}, Threshold={threshold}, Window={window}")
 
@@ -440,15 +731,14 @@ class MonitorManager:
                     logger.warning(f"Alert storm detected ({len(self.alert_history)} alerts in last {window}s). Suppressing individual alert for {node.name}.")
                     
                     # Send General "Outage detected" alert if not sent recently (limit to once per window)
-                    if now - self.last_storm_alert_time > window:
+                    if self.last_storm_alert_time is None or now - self.last_storm_alert_time > window:
                         self.last_storm_alert_time = now
                         title = "⚠️ Global Alert: High failure rate detected"
                         message = f"Alert Storm: {len(self.alert_history)} nodes down within {window}s. Suppressing individual alerts to prevent spam."
                         priority = 1 # High priority
                         
-                        # Use keys (already fetched below, so we need to move fetching up or re-fetch)
-                        token = pushover_config.get("token")
-                        user_key = pushover_config.get("user_key")
+                        token = pushover_config.token
+                        user_key = pushover_config.user_key
                         if token and user_key:
                             self.pushover.configure(token, user_key)
                             await self.pushover.send_notification(title, message, priority)
@@ -457,8 +747,8 @@ class MonitorManager:
                 # Add current to history
                 self.alert_history.append(now)
 
-            token = pushover_config.get("token")
-            user_key = pushover_config.get("user_key")
+            token = pushover_config.token
+            user_key = pushover_config.user_key
             
             if not token or not user_key:
                 logger.warning("Pushover enabled but credentials missing. Skipping alert.")
@@ -469,9 +759,9 @@ class MonitorManager:
             
             # Format message
             # Use node-specific priority if set, otherwise fall back to global
-            global_priority = int(pushover_config.get("priority", 0))
+            global_priority = pushover_config.priority
             priority = node.notification_priority if node.notification_priority is not None else global_priority
-            template = pushover_config.get("message_template", "Node {name} ({ip}) is DOWN")
+            template = pushover_config.message_template
             
             message = template.format(name=node.name, ip=node.ip)
             title = f"BeamState Alert: {node.name}"
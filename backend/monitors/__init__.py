@@ -1,6 +1,6 @@
 """Monitor module exports"""
-from .base import BaseMonitor, MonitorResult
+from .base import BaseMonitor, MonitorResult, EMPTY_RAW_DATA
 from .ping_monitor import PingMonitor
 from .snmp_monitor import SNMPMonitor
 
-__all__ = ['BaseMonitor', 'MonitorResult', 'PingMonitor', 'SNMPMonitor']
+__all__ = ['BaseMonitor', 'MonitorResult', 'EMPTY_RAW_DATA', 'PingMonitor', 'SNMPMonitor']
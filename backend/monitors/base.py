@@ -1,15 +1,19 @@
 """Base classes for monitoring protocols"""
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Mapping, Any
 
+# Shared read-only stand-in for "no raw data" (avoids a fresh {} per result)
+EMPTY_RAW_DATA: Mapping[str, Any] = MappingProxyType({})
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class MonitorResult:
-    """Standardized result from any monitor"""
+    """Standardized result from any monitor (immutable once created)"""
     success: bool
     latency_ms: Optional[float]
     protocol: str  # "icmp", "snmp"
-    raw_data: Dict[str, Any]
+    raw_data: Mapping[str, Any]
     error: Optional[str] = None
 
 
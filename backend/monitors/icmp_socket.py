@@ -0,0 +1,164 @@
+"""Asyncio-native ICMP echo over a single shared socket"""
+import asyncio
+import logging
+import os
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("BeamState.IcmpSocket")
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+PAYLOAD = b"BeamState-ping".ljust(32, b"\0")
+# Gap between echoes to the same host; a tight burst can get rate-limited or dropped by the target
+SEND_GAP = 0.01
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _checksum(header + PAYLOAD)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + PAYLOAD
+
+
+class IcmpPingSocket:
+    """
+    One ICMP socket shared by all pings on an event loop.
+
+    Echo requests are sent without blocking and replies are read by a loop
+    reader callback, matched to their waiting future by (source ip, sequence).
+    Uses an unprivileged ICMP datagram socket where the kernel allows it and
+    falls back to a raw socket (needs root / CAP_NET_RAW).
+    """
+    _instance: Optional["IcmpPingSocket"] = None
+    _unavailable = False
+
+    def __init__(self, sock: socket.socket, raw: bool, loop: asyncio.AbstractEventLoop):
+        self.sock = sock
+        self.raw = raw
+        self.loop = loop
+        # Datagram sockets get their identifier rewritten by the kernel, so only raw sockets check it
+        self.ident = os.getpid() & 0xFFFF
+        self._seq = 0
+        self._pending: Dict[Tuple[str, int], Tuple[asyncio.Future, float]] = {}
+        loop.add_reader(sock.fileno(), self._on_readable)
+
+    @classmethod
+    def get(cls) -> Optional["IcmpPingSocket"]:
+        """Shared socket for the running loop, or None if ICMP sockets can't be used here"""
+        if cls._unavailable:
+            return None
+        loop = asyncio.get_running_loop()
+        if cls._instance is not None and cls._instance.loop is loop:
+            return cls._instance
+        if cls._instance is not None:
+            cls._instance.close()
+            cls._instance = None
+
+        for sock_type, raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            sock.setblocking(False)
+            try:
+                cls._instance = cls(sock, raw, loop)
+            except NotImplementedError:
+                # e.g. the Windows proactor loop has no add_reader
+                sock.close()
+                break
+            logger.info(f"Using {'raw' if raw else 'datagram'} ICMP socket for pings")
+            return cls._instance
+
+        cls._unavailable = True
+        logger.info("ICMP sockets unavailable, falling back to ping3")
+        return None
+
+    def close(self):
+        try:
+            self.loop.remove_reader(self.sock.fileno())
+        except Exception:
+            pass
+        self.sock.close()
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
+
+    def _next_seq(self) -> int:
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def _on_readable(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"ICMP receive error: {e}")
+                return
+
+            # Raw sockets (and datagram sockets on some platforms) include the IPv4 header
+            if len(data) >= 20 and data[0] >> 4 == 4:
+                data = data[(data[0] & 0x0F) * 4:]
+            if len(data) < 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            if icmp_type != ICMP_ECHO_REPLY or (self.raw and ident != self.ident):
+                continue
+
+            entry = self._pending.pop((addr[0], seq), None)
+            if entry is not None:
+                future, sent_at = entry
+                if not future.done():
+                    future.set_result(time.perf_counter() - sent_at)
+
+    async def ping(self, ip: str, count: int, timeout: float) -> List[Optional[float]]:
+        """
+        Send `count` echo requests to ip, SEND_GAP apart, and wait up to `timeout` for the replies.
+
+        Returns:
+            Per-packet round trip in seconds, None for packets without a reply
+        """
+        if count <= 0:
+            return []
+        keys = []
+        futures = []
+        for i in range(count):
+            if i:
+                await asyncio.sleep(SEND_GAP)
+            seq = self._next_seq()
+            key = (ip, seq)
+            future = self.loop.create_future()
+            self._pending[key] = (future, time.perf_counter())
+            try:
+                self.sock.sendto(_echo_request(self.ident, seq), (ip, 0))
+            except OSError as e:
+                logger.debug(f"ICMP send to {ip} failed: {e}")
+                self._pending.pop(key, None)
+                future.set_result(None)
+            keys.append(key)
+            futures.append(future)
+
+        await asyncio.wait(futures, timeout=timeout)
+
+        results = []
+        for key, future in zip(keys, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                self._pending.pop(key, None)
+                future.cancel()
+                results.append(None)
+        return results
@@ -1,17 +1,42 @@
 """Ping monitoring implementation"""
 import asyncio
+import ipaddress
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Tuple, List, Optional
 from ping3 import ping
 from .base import BaseMonitor, MonitorResult
+from .icmp_socket import SEND_GAP, IcmpPingSocket
 
 logger = logging.getLogger("BeamState.PingMonitor")
 
+# ping3 blocks for up to `timeout` per packet. Run it on its own pool, sized above the
+# monitor's node concurrency, so slow targets don't starve the default executor (DB, file I/O).
+PING_WORKERS = 64
+
+
+@lru_cache(maxsize=4096)
+def _is_ipv4(ip: str) -> bool:
+    try:
+        ipaddress.IPv4Address(ip)
+        return True
+    except ValueError:
+        return False
+
 
 class PingMonitor(BaseMonitor):
     """ICMP ping health check monitor"""
     
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=PING_WORKERS, thread_name_prefix="ping")
+        return cls._executor
+    
     async def check(self, ip: str, count: int = 1, timeout: int = 5) -> MonitorResult:
         """
         Perform ICMP ping check.
@@ -45,28 +70,21 @@ class PingMonitor(BaseMonitor):
         Returns:
             Tuple of (avg_latency_ms, packet_loss_percent, raw_responses)
         """
+        icmp = IcmpPingSocket.get() if _is_ipv4(ip) else None
+        if icmp is not None:
+            # All echoes go out at once on the shared socket; replies are matched as they arrive
+            raw_responses = await icmp.ping(ip, count, timeout)
+        else:
+            raw_responses = await self._ping3(ip, count, timeout)
+        
         success_count = 0
         total_latency = 0.0
-        raw_responses = []
-        
-        for _ in range(count):
-            try:
-                # ping3.ping returns latency in seconds, None on timeout, or False on error
-                # Offload blocking call to thread
-                latency_sec = await asyncio.to_thread(ping, ip, timeout=timeout)
-                raw_responses.append(latency_sec)
-                if latency_sec is not None and latency_sec is not False:
-                    total_latency += latency_sec * 1000  # to ms
-                    success_count += 1
-                else:
-                    logger.debug(f"Ping returned {latency_sec} for {ip}")
-            except Exception as e:
-                logger.debug(f"Ping error for {ip}: {e}")
-                raw_responses.append(f"Exception: {str(e)}")
-            
-            # Small delay between packets if count > 1
-            if count > 1:
-                await asyncio.sleep(0.5)
+        for latency_sec in raw_responses:
+            if isinstance(latency_sec, float):
+                total_latency += latency_sec * 1000  # to ms
+                success_count += 1
+            else:
+                logger.debug(f"Ping returned {latency_sec} for {ip}")
 
         if success_count == 0:
             return None, 100.0, raw_responses  # No response, 100% loss
@@ -75,3 +93,22 @@ class PingMonitor(BaseMonitor):
         packet_loss = ((count - success_count) / count) * 100.0
         
         return avg_latency, packet_loss, raw_responses
+
+    async def _ping3(self, ip: str, count: int, timeout: int) -> List:
+        """Fallback for platforms without usable ICMP sockets: concurrent blocking ping3 calls, one per packet"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        
+        async def ping_once(delay: float):
+            # Stagger the packets slightly instead of sending them as one burst
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                # ping3.ping returns latency in seconds, None on timeout, or False on error
+                # Offload blocking call to the ping pool
+                return await loop.run_in_executor(executor, partial(ping, ip, timeout=timeout))
+            except Exception as e:
+                logger.debug(f"Ping error for {ip}: {e}")
+                return f"Exception: {str(e)}"
+        
+        return list(await asyncio.gather(*(ping_once(i * SEND_GAP) for i in range(count))))
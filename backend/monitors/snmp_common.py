@@ -0,0 +1,20 @@
+"""Shared pysnmp engine and transport targets"""
+from functools import lru_cache
+from typing import Optional
+from pysnmp.hlapi.asyncio import SnmpEngine, UdpTransportTarget
+
+_engine: Optional[SnmpEngine] = None
+
+
+def get_snmp_engine() -> SnmpEngine:
+    """Process-wide SnmpEngine (building one sets up MIB, SMI and dispatcher state)"""
+    global _engine
+    if _engine is None:
+        _engine = SnmpEngine()
+    return _engine
+
+
+@lru_cache(maxsize=4096)
+def get_transport(ip: str, port: int, timeout: float, retries: int) -> UdpTransportTarget:
+    """Transport target per (ip, port, timeout, retries); the address is resolved only once"""
+    return UdpTransportTarget((ip, port), timeout=timeout, retries=retries)
@@ -1,25 +1,65 @@
 import asyncio
+import heapq
 from pysnmp.hlapi.asyncio import *
-from typing import List, Dict, Optional
-from models import NodeDB, NodeMetricDB, MetricDefinitionDB
+from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+from pyasn1.type import univ
+from typing import Any, List, Dict, Optional, Set, Tuple
+from sqlalchemy.orm import joinedload, selectinload
+from models import NodeDB, NodeMetricDB
 from database import SessionLocal
 from storage import storage
+from .snmp_common import get_snmp_engine, get_transport
 import logging
 import time
 
 logger = logging.getLogger("BeamState.SNMPCollector")
 
+# Max varbinds per SNMP GET request (keeps responses well below typical UDP/agent PDU limits)
+OID_BATCH_SIZE = 32
+
+# Indexed metrics sharing one table column are walked with GETBULK once there are this many
+BULK_MIN_ROWS = 4
+# Upper bound on rows requested per GETBULK
+BULK_MAX_REPETITIONS = 50
+
+# How often resolved OID strings are dropped and re-resolved from the metric definitions
+OID_CACHE_REFRESH = 3600
+
+# Fallback reload interval for the node/metric inventory; config changes made through
+# the API reload it immediately via invalidate_inventory()
+INVENTORY_REFRESH = 300
+
+# Collection interval used when a node has no metric with its own interval
+DEFAULT_COLLECTION_INTERVAL = 60
+
+def _to_python(val) -> Any:
+    """Native value for a varbind: int for the integer SMI types (Counter32/64, Gauge32, TimeTicks, ...), else str"""
+    if isinstance(val, univ.Integer):
+        return int(val)
+    return str(val)
+
 class SNMPDataCollector:
     def __init__(self):
         self.running = False
         self.collection_tasks = {}  # node_id -> task
-        # Current metric values: {node_metric_id: {'value': val, 'rate': rate, 'timestamp': ts}}
-        self.current_values = {}
+        # Current metric values by node: {node_id: {node_metric_id: {'value': val, 'rate': rate, 'timestamp': ts}}}
+        self.current_values: Dict[str, Dict[str, dict]] = {}
         # Previous raw values for delta calc: {node_metric_id: {'value': val, 'timestamp': ts}}
         # Note: Rate calc moved to MetricProcessor, but we might keep this if needed or just remove.
         # Ideally, MetricProcessor handles it.
         self.metric_processor = None
-        self.snmp_engine = SnmpEngine()   
+        self.snmp_engine = get_snmp_engine()
+        # Bound concurrent per-node collections (each holds UDP sockets)
+        self._sem = asyncio.Semaphore(64)
+        # Collection schedule: heap of (next_due monotonic ts, node_id), one entry per scheduled node
+        self._due: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+        # Set when nodes/metrics change so main_loop reloads the inventory right away
+        self._inventory_dirty = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Resolved OID strings: {node_metric_id: oid}, filled lazily and dropped every OID_CACHE_REFRESH
+        self._prepared_oids: Dict[str, Optional[str]] = {}
+        self._prepared_ts = time.monotonic()
         
     def set_processor(self, processor):
         self.metric_processor = processor
@@ -27,6 +67,7 @@ class SNMPDataCollector:
     async def start(self):
         """Start the collector service"""
         self.running = True
+        self._loop = asyncio.get_running_loop()
         logger.info("SNMP Data Collector started")
         # Start collection loop
         asyncio.create_task(self.main_loop())
@@ -36,47 +77,89 @@ class SNMPDataCollector:
         self.running = False
         logger.info("SNMP Data Collector stopping...")
         
+    def _load_nodes(self) -> Dict[str, NodeDB]:
+        """
+        Load all SNMP nodes with their group, metrics and definitions in one query.
+        Collection then works on the detached objects without touching the DB.
+        """
+        db = SessionLocal()
+        try:
+            nodes = db.query(NodeDB).options(
+                joinedload(NodeDB.group),
+                selectinload(NodeDB.node_metrics).joinedload(NodeMetricDB.metric_definition)
+            ).filter(NodeDB.enabled == True, NodeDB.monitor_snmp == True).all()
+            return {node.id: node for node in nodes}
+        finally:
+            db.close()
+
+    @staticmethod
+    def _snmp_metrics(node: NodeDB) -> List[NodeMetricDB]:
+        """Enabled SNMP-sourced metrics of a node; ICMP metrics are filled in by the pinger"""
+        return [
+            nm for nm in node.node_metrics
+            if nm.enabled and nm.metric_definition is not None
+            and (nm.metric_definition.metric_source or "snmp") == "snmp"
+        ]
+
+    def _node_interval(self, node: NodeDB) -> int:
+        """A node is collected as often as its most frequent metric asks for"""
+        intervals = [nm.collection_interval for nm in self._snmp_metrics(node) if nm.collection_interval]
+        return max(1, min(intervals)) if intervals else DEFAULT_COLLECTION_INTERVAL
+
     async def main_loop(self):
-        """Main loop checking for nodes that need collection"""
+        """Main loop: sleep until the next node is due, collect every due node, reschedule them"""
+        nodes: Dict[str, NodeDB] = {}
+        next_refresh = 0.0
         while self.running:
             try:
-                # Get all nodes with enabled SNMP metrics
-                db = SessionLocal()
-                try:
-                    # In a real efficient system, we'd query just what we need
-                    # For now, iterate all enabled nodes with enabled metrics
-                    nodes = db.query(NodeDB).filter(NodeDB.enabled == True, NodeDB.monitor_snmp == True).all()
-                    
-                    for node in nodes:
-                        # Check if we should collect for this node
-                        # Ideally, this should be scheduled individually based on interval
-                        # For Phase 1 simplicity: collect all every 60s
-                        # Future: Implement per-node/per-metric scheduling
-                        await self.collect_node_metrics(node.id)
-                        
-                finally:
-                    db.close()
-                    
-                # Sleep for 60s (production interval)
-                await asyncio.sleep(60) 
+                now = time.monotonic()
+                if now - self._prepared_ts > OID_CACHE_REFRESH:
+                    self.invalidate_prepared()
+                
+                if now >= next_refresh or self._inventory_dirty.is_set():
+                    self._inventory_dirty.clear()
+                    nodes = self._load_nodes()
+                    next_refresh = now + INVENTORY_REFRESH
+                    # New nodes are due immediately; removed ones are dropped when popped
+                    for node_id in nodes.keys() - self._scheduled:
+                        heapq.heappush(self._due, (now, node_id))
+                        self._scheduled.add(node_id)
+                
+                wake_at = min(self._due[0][0], next_refresh) if self._due else next_refresh
+                if wake_at > now:
+                    try:
+                        await asyncio.wait_for(self._inventory_dirty.wait(), timeout=wake_at - now)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                due_nodes = []
+                while self._due and self._due[0][0] <= now:
+                    _, node_id = heapq.heappop(self._due)
+                    node = nodes.get(node_id)
+                    if node is None:
+                        self._scheduled.discard(node_id)
+                        continue
+                    due_nodes.append(node)
+                    heapq.heappush(self._due, (now + self._node_interval(node), node_id))
+                
+                # Nodes are independent UDP conversations - collect them concurrently
+                await asyncio.gather(*(self.collect_node_metrics(node) for node in due_nodes), return_exceptions=True)
                 
             except Exception as e:
                 logger.error(f"Error in main collection loop: {e}")
                 await asyncio.sleep(60)
     
-    async def collect_node_metrics(self, node_id: str):
-        """Collect all enabled metrics for a specific node"""
-        db = SessionLocal()
+    async def collect_node_metrics(self, node: NodeDB):
+        """Collect all enabled metrics for a node (group and metrics must already be loaded)"""
+        async with self._sem:
+            await self._collect_node_metrics(node)
+
+    async def _collect_node_metrics(self, node: NodeDB):
+        # Storage writes for this node, made in one call once collection is done
+        pending: list = []
         try:
-            node = db.query(NodeDB).filter(NodeDB.id == node_id).first()
-            if not node:
-                return
-            
-            # Get enabled metrics
-            node_metrics = db.query(NodeMetricDB).join(MetricDefinitionDB).filter(
-                NodeMetricDB.node_id == node_id,
-                NodeMetricDB.enabled == True
-            ).all()
+            node_metrics = self._snmp_metrics(node)
             
             if not node_metrics:
                 return
@@ -87,39 +170,197 @@ class SNMPDataCollector:
             
             logger.debug(f"Collecting {len(node_metrics)} metrics for {node.name}")
             
+            # Resolve OIDs, skipping indexed metrics without an interface index.
+            # Indexed metrics are also grouped by table column: {column_oid: {index: [node_metric]}}
+            targets = []
+            columns: Dict[str, Dict[int, List[NodeMetricDB]]] = {}
             for node_metric in node_metrics:
-                val = await self.collect_single_metric(node, node_metric, community, port)
-                if val is not None:
-                    # Pass the definition's metric type and unit to store_metric_value
-                    await self.store_metric_value(
-                        node,
-                        node_metric,
-                        val
-                    )
+                oid = self._resolve_oid(node_metric)
+                if oid is None:
+                    continue
+                template = node_metric.metric_definition.oid_template
+                if node_metric.metric_definition.requires_index and template.endswith(".{index}"):
+                    columns.setdefault(template[:-len(".{index}")], {}).setdefault(
+                        node_metric.interface_index, []
+                    ).append(node_metric)
+                else:
+                    targets.append((node_metric, oid))
+            
+            # Wide columns (e.g. ifInOctets across many ports) come back in one GETBULK walk
+            for column_oid, rows in columns.items():
+                if len(rows) >= BULK_MIN_ROWS:
+                    values = await self.collect_column(node, column_oid, sorted(rows), community, port)
+                    if values is not None:
+                        for index, val in values.items():
+                            for node_metric in rows[index]:
+                                await self.store_metric_value(node, node_metric, val, pending)
+                        continue
+                # Narrow column, or the walk failed: fetch with the batched GETs
+                for metric_list in rows.values():
+                    targets.extend((node_metric, self._resolve_oid(node_metric)) for node_metric in metric_list)
+            
+            # One GET per batch of OIDs instead of one round trip per metric
+            for i in range(0, len(targets), OID_BATCH_SIZE):
+                batch = targets[i:i + OID_BATCH_SIZE]
+                values = await self.collect_metric_batch(node, batch, community, port)
+                for (node_metric, _), val in zip(batch, values):
+                    if val is not None:
+                        await self.store_metric_value(node, node_metric, val, pending)
                     
         except Exception as e:
-            logger.error(f"Error collecting metrics for node {node_id}: {e}")
+            logger.error(f"Error collecting metrics for node {node.id}: {e}")
         finally:
-            db.close()
+            if pending:
+                group_name = node.group.name if node.group else "global"
+                await storage.write_snmp_metrics(node.name, node.ip, group_name, pending)
+            
+    def invalidate_inventory(self):
+        """Reload nodes and metrics from the DB on the next loop pass (after config changes)"""
+        # Routers run in worker threads; asyncio.Event must be set from its own loop
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._inventory_dirty.set)
+        else:
+            self._inventory_dirty.set()
+
+    def _resolve_oid(self, node_metric: NodeMetricDB) -> Optional[str]:
+        """Format the metric's OID template with its interface index (None if the index is missing)"""
+        try:
+            return self._prepared_oids[node_metric.id]
+        except KeyError:
+            pass
+        metric_def = node_metric.metric_definition
+        if metric_def.requires_index:
+            if node_metric.interface_index is None:
+                oid = None
+            else:
+                oid = metric_def.oid_template.replace("{index}", str(node_metric.interface_index))
+        else:
+            oid = metric_def.oid_template
+        self._prepared_oids[node_metric.id] = oid
+        return oid
+
+    def invalidate_prepared(self):
+        """Drop all resolved OIDs so they are re-resolved on the next collection"""
+        self._prepared_oids.clear()
+        self._prepared_ts = time.monotonic()
+
+    async def collect_column(self, node: NodeDB, column_oid: str, indexes: List[int], community: str, port: int) -> Optional[Dict[int, Any]]:
+        """
+        Walk one table column with GETBULK and pick out the requested rows.
+        
+        Args:
+            column_oid: Column OID without the row index (e.g. ifInOctets "1.3.6.1.2.1.2.2.1.10")
+            indexes: Sorted row indexes to collect
             
+        Returns:
+            {index: value} for the requested rows the agent returned, or None if the walk failed
+        """
+        column = tuple(int(part) for part in column_oid.split("."))
+        wanted = set(indexes)
+        last = indexes[-1]
+        # GETNEXT semantics: start just before the first wanted row
+        cursor = indexes[0] - 1
+        values = {}
+        
+        try:
+            while cursor < last:
+                start_oid = f"{column_oid}.{cursor}" if cursor > 0 else column_oid
+                errorIndication, errorStatus, errorIndex, varBindTable = await bulkCmd(
+                    self.snmp_engine,
+                    CommunityData(community),
+                    get_transport(node.ip, port, 2.0, 1),
+                    ContextData(),
+                    0, min(BULK_MAX_REPETITIONS, last - cursor),
+                    ObjectType(ObjectIdentity(start_oid)),
+                    lookupMib=False
+                )
+                
+                if errorIndication:
+                    logger.warning(f"SNMP Timed out for {node.name} walking {column_oid}")
+                    return None
+                elif errorStatus:
+                    logger.warning(f"SNMP Error: {errorStatus.prettyPrint()} for {node.name} walking {column_oid}")
+                    return None
+                if not varBindTable:
+                    break
+                
+                for row in varBindTable:
+                    name, val = row[0]
+                    name = tuple(name)
+                    # Stop once the walk leaves the column (or stops advancing)
+                    if (isinstance(val, EndOfMibView) or len(name) != len(column) + 1
+                            or name[:-1] != column or name[-1] <= cursor):
+                        return values
+                    cursor = name[-1]
+                    if cursor in wanted:
+                        values[cursor] = _to_python(val)
+                    if cursor >= last:
+                        break
+        except Exception as e:
+            logger.error(f"Column walk exception: {e}")
+            return None
+        
+        return values
+
+    async def collect_metric_batch(self, node: NodeDB, batch: List[tuple], community: str, port: int) -> List[Any]:
+        """
+        Collect several metrics with a single SNMP GET.
+        
+        Args:
+            batch: List of (node_metric, oid) tuples
+            
+        Returns:
+            Values in the same order as batch (None where the agent had no value)
+        """
+        if len(batch) == 1:
+            node_metric, _ = batch[0]
+            return [await self.collect_single_metric(node, node_metric, community, port)]
+        
+        try:
+            errorIndication, errorStatus, errorIndex, varBinds = await getCmd(
+                self.snmp_engine,
+                CommunityData(community),
+                get_transport(node.ip, port, 2.0, 1),
+                ContextData(),
+                *[ObjectType(ObjectIdentity(oid)) for _, oid in batch]
+            )
+        except Exception as e:
+            logger.error(f"Metric batch collection exception: {e}")
+            return [None] * len(batch)
+        
+        if errorIndication:
+            logger.warning(f"SNMP Timed out for {node.name} ({len(batch)} metrics)")
+            return [None] * len(batch)
+        elif errorStatus:
+            # One bad OID fails the whole PDU - fall back to individual GETs for this batch
+            logger.warning(f"SNMP Error: {errorStatus.prettyPrint()} for {node.name} batch, retrying individually")
+            return [await self.collect_single_metric(node, node_metric, community, port) for node_metric, _ in batch]
+        
+        values = []
+        for varBind in varBinds:
+            val = varBind[1]
+            if isinstance(val, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                values.append(None)
+            else:
+                # Convert to Python type
+                values.append(_to_python(val))
+        return values
+
     async def collect_single_metric(self, node: NodeDB, node_metric: NodeMetricDB, community: str, port: int):
         """Collect a single metric via SNMP GET"""
         try:
             metric_def = node_metric.metric_definition
             
             # Format OID with index if needed
-            if metric_def.requires_index:
-                if node_metric.interface_index is None:
-                    return None
-                oid = metric_def.oid_template.replace("{index}", str(node_metric.interface_index))
-            else:
-                oid = metric_def.oid_template
+            oid = self._resolve_oid(node_metric)
+            if oid is None:
+                return None
                 
             # Perform SNMP GET
             errorIndication, errorStatus, errorIndex, varBinds = await getCmd(
                 self.snmp_engine,
                 CommunityData(community),
-                UdpTransportTarget((node.ip, port), timeout=2.0, retries=1),
+                get_transport(node.ip, port, 2.0, 1),
                 ContextData(),
                 ObjectType(ObjectIdentity(oid))
             )
@@ -134,31 +375,55 @@ class SNMPDataCollector:
             for varBind in varBinds:
                 val = varBind[1]
                 # Convert to Python type
-                return str(val)
+                return _to_python(val)
                 
         except Exception as e:
             logger.error(f"Metric collection exception: {e}")
             return None
             
-    async def store_metric_value(self, node: NodeDB, node_metric: NodeMetricDB, value: str):
-        """Store the latest metric value using MetricProcessor"""
+    async def store_metric_value(self, node: NodeDB, node_metric: NodeMetricDB, value: Any, pending: Optional[list] = None):
+        """Store the latest metric value using MetricProcessor (storage writes go to `pending` if given)"""
         if not self.metric_processor:
             return
 
         try:
              # Delegate to processor
-             result = await self.metric_processor.process_metric(node, node_metric, value)
+             result = await self.metric_processor.process_metric(node, node_metric, value, pending)
              
              if result:
                  # Update local cache for API
-                 self.current_values[node_metric.id] = result
+                 self.set_current_value(node.id, node_metric.id, result)
                  
         except Exception as e:
             logger.error(f"Error storing metric {node_metric.id}: {e}")
         
+    def set_current_value(self, node_id: str, node_metric_id: str, entry: dict):
+        self.current_values.setdefault(node_id, {})[node_metric_id] = entry
+
+    def get_current_value(self, node_id: str, node_metric_id: str) -> Optional[dict]:
+        node_values = self.current_values.get(node_id)
+        return node_values.get(node_metric_id) if node_values else None
+
+    def forget_metrics(self, node_id: str, node_metric_ids: List[str]):
+        """Drop cached values for node metrics that no longer exist"""
+        node_values = self.current_values.get(node_id, {})
+        for node_metric_id in node_metric_ids:
+            node_values.pop(node_metric_id, None)
+            self._prepared_oids.pop(node_metric_id, None)
+            if self.metric_processor:
+                self.metric_processor.previous_values.pop(node_metric_id, None)
+
+    def forget_node(self, node_id: str):
+        """Drop all cached values of a removed node"""
+        self.forget_metrics(node_id, list(self.current_values.pop(node_id, {})))
+
     def get_current_values(self, node_id: str = None) -> Dict:
-        """Get current values, optionally filtered by node"""
+        """Get current values as {node_metric_id: entry}, optionally only for one node"""
         if node_id is None:
-            return self.current_values
-        return self.current_values
+            return {
+                node_metric_id: entry
+                for node_values in self.current_values.values()
+                for node_metric_id, entry in node_values.items()
+            }
+        return self.current_values.get(node_id, {})
 
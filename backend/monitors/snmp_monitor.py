@@ -4,7 +4,8 @@ import logging
 import time
 from typing import Optional, Tuple
 from pysnmp.hlapi.asyncio import *
-from .base import BaseMonitor, MonitorResult
+from .base import BaseMonitor, MonitorResult, EMPTY_RAW_DATA
+from .snmp_common import get_snmp_engine, get_transport
 
 logger = logging.getLogger("BeamState.SNMPMonitor")
 
@@ -14,7 +15,7 @@ class SNMPMonitor(BaseMonitor):
     
     def __init__(self):
         super().__init__()
-        self.snmp_engine = SnmpEngine()
+        self.snmp_engine = get_snmp_engine()
     
     # OID for sysUpTime (1.3.6.1.2.1.1.3.0)
     SYS_UPTIME_OID = ObjectIdentity('1.3.6.1.2.1.1.3.0')
@@ -46,7 +47,7 @@ class SNMPMonitor(BaseMonitor):
                     success=False,
                     latency_ms=None,
                     protocol="snmp",
-                    raw_data={},
+                    raw_data=EMPTY_RAW_DATA,
                     error=error
                 )
             
@@ -64,7 +65,7 @@ class SNMPMonitor(BaseMonitor):
                 success=False,
                 latency_ms=None,
                 protocol="snmp",
-                raw_data={},
+                raw_data=EMPTY_RAW_DATA,
                 error=str(e)
             )
     
@@ -79,7 +80,7 @@ class SNMPMonitor(BaseMonitor):
             iterator = getCmd(
                 self.snmp_engine,
                 CommunityData(community, mpModel=1),  # SNMPv2c
-                UdpTransportTarget((ip, port), timeout=timeout, retries=0),
+                get_transport(ip, port, timeout, 0),
                 ContextData(),
                 ObjectType(oid)
             )
@@ -10,6 +10,23 @@ class PushoverClient:
     def __init__(self, token: Optional[str] = None, user_key: Optional[str] = None):
         self.token = token
         self.user_key = user_key
+        # Shared HTTP client so repeated alerts reuse the keep-alive TLS connection
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the shared client (must happen inside the running event loop)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared client and its pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
 
     def configure(self, token: str, user_key: str):
         """Update credentials at runtime"""
@@ -47,15 +64,15 @@ class PushoverClient:
 
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.API_URL, data=payload, timeout=10.0)
-                
-                if response.status_code == 200:
-                    logger.info(f"Notification sent: {title}")
-                    return True
-                else:
-                    logger.error(f"Failed to send notification: status={response.status_code}, response={response.text}")
-                    return False
+            client = self._get_client()
+            response = await client.post(self.API_URL, data=payload)
+            
+            if response.status_code == 200:
+                logger.info(f"Notification sent: {title}")
+                return True
+            else:
+                logger.error(f"Failed to send notification: status={response.status_code}, response={response.text}")
+                return False
         except Exception as e:
             logger.error(f"Error sending Pushover notification: {e}")
             return False
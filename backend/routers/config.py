@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
-from models import Group, GroupCreate, GroupDB, Node, NodeCreate, NodeDB
-from utils import save_config
+from models import Group, GroupCreate, GroupDB, Node, NodeCreate, NodeDB, NodeInterfaceDB, NodeMetricDB
+from utils import request_save_config
 import uuid
 
 import logging
@@ -33,10 +33,9 @@ def create_group(group: GroupCreate, db: Session = Depends(get_db)):
         new_group = GroupDB(**group.model_dump())
         db.add(new_group)
         db.commit()
-        db.refresh(new_group)
         
         # Sync to config.json
-        save_config(db)
+        request_save_config()
         logger.info(f"Created group: {new_group.name} (ID: {new_group.id})")
         
         return new_group
@@ -48,7 +47,7 @@ def create_group(group: GroupCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to create group: {str(e)}")
 
 @router.put("/groups/{group_id}", response_model=Group)
-def update_group(group_id: str, group: GroupCreate, request: Request, db: Session = Depends(get_db)):
+def update_group(group_id: str, group: GroupCreate, request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
     if not db_group:
         raise HTTPException(status_code=404, detail="Group not found")
@@ -66,21 +65,24 @@ def update_group(group_id: str, group: GroupCreate, request: Request, db: Sessio
         db.query(GroupDB).filter(GroupDB.id != group_id).update({GroupDB.is_default: False})
         
     db.commit()
-    db.refresh(db_group)
     
     # Sync to config.json
-    save_config(db)
+    request_save_config()
     
     # Trigger immediate check for all nodes in group if it was just unpaused
     # Trigger immediate check (unpause) or set status (pause)
     if hasattr(request.app.state, "pinger"):
+        # Group defaults feed its nodes' effective settings
+        request.app.state.pinger.reload_group(group_id)
+        
         if was_paused and will_be_enabled:
-            # Unpausing: Trigger immediate checks
-            nodes = db.query(NodeDB).filter(NodeDB.group_id == group_id).all()
-            for node in nodes:
-                if node.enabled:  # Only trigger for enabled nodes
-                    request.app.state.pinger.trigger_immediate_check(str(node.id))
-            logger.info(f"Group {db_group.name} unpaused - triggering immediate checks for {len(nodes)} nodes")
+            # Unpausing: Trigger immediate checks (only for enabled nodes), after the response is sent
+            node_ids = [
+                str(row.id) for row in
+                db.query(NodeDB.id).filter(NodeDB.group_id == group_id, NodeDB.enabled == True).all()
+            ]
+            background_tasks.add_task(request.app.state.pinger.trigger_immediate_check_many, node_ids)
+            logger.info(f"Group {db_group.name} unpaused - triggering immediate checks for {len(node_ids)} nodes")
         
         elif not will_be_enabled and (not was_paused): # Just paused
              # Pausing: Set status immediately
@@ -98,19 +100,24 @@ def delete_group(group_id: str, request: Request, db: Session = Depends(get_db))
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
-    # Explicitly delete nodes first to ensure clean removal
-    nodes = db.query(NodeDB).filter(NodeDB.group_id == group_id).all()
-    for node in nodes:
-        # Also remove from pinger cache if needed
-        if hasattr(request.app.state, "pinger"):
-            request.app.state.pinger.remove_node(node.id)
-        db.delete(node)
+    # Explicitly delete nodes first to ensure clean removal.
+    # Bulk deletes skip the ORM cascade, so the node children are removed here too.
+    node_ids = [row.id for row in db.query(NodeDB.id).filter(NodeDB.group_id == group_id).all()]
+    if node_ids:
+        db.query(NodeMetricDB).filter(NodeMetricDB.node_id.in_(node_ids)).delete(synchronize_session=False)
+        db.query(NodeInterfaceDB).filter(NodeInterfaceDB.node_id.in_(node_ids)).delete(synchronize_session=False)
+        db.query(NodeDB).filter(NodeDB.group_id == group_id).delete(synchronize_session=False)
         
     db.delete(group)
     db.commit()
     
+    # Also remove from pinger cache if needed
+    if hasattr(request.app.state, "pinger"):
+        for node_id in node_ids:
+            request.app.state.pinger.remove_node(node_id)
+    
     # Sync to config.json
-    save_config(db)
+    request_save_config()
     
     return {"ok": True}
 
@@ -122,7 +129,7 @@ def read_nodes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return nodes
 
 @router.post("/nodes", response_model=Node)
-def create_node(node: NodeCreate, db: Session = Depends(get_db)):
+def create_node(node: NodeCreate, request: Request, db: Session = Depends(get_db)):
     # IP validation is handled by Pydantic model (NodeCreate.validate_ip_address)
     
     if node.group_id:
@@ -133,15 +140,17 @@ def create_node(node: NodeCreate, db: Session = Depends(get_db)):
     new_node = NodeDB(**node.model_dump())
     db.add(new_node)
     db.commit()
-    db.refresh(new_node)
     
     # Sync to config.json
-    save_config(db)
+    request_save_config()
+    
+    if hasattr(request.app.state, "pinger"):
+        request.app.state.pinger.invalidate_nodes([new_node.id])
     
     return new_node
 
 @router.put("/nodes/{node_id}", response_model=Node)
-def update_node(node_id: str, node: NodeCreate, request: Request, db: Session = Depends(get_db)):
+def update_node(node_id: str, node: NodeCreate, request: Request, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     db_node = db.query(NodeDB).filter(NodeDB.id == node_id).first()
     if not db_node:
         raise HTTPException(status_code=404, detail="Node not found")
@@ -154,16 +163,17 @@ def update_node(node_id: str, node: NodeCreate, request: Request, db: Session =
         setattr(db_node, key, value)
     
     db.commit()
-    db.refresh(db_node)
     
     # Sync to config.json
-    save_config(db)
+    request_save_config()
     
     # Trigger immediate check if node was just unpaused
     # Trigger immediate check (unpause) or set status (pause)
     if hasattr(request.app.state, "pinger"):
+        request.app.state.pinger.invalidate_nodes([node_id])
+        
         if was_paused and will_be_enabled:
-            request.app.state.pinger.trigger_immediate_check(node_id)
+            background_tasks.add_task(request.app.state.pinger.trigger_immediate_check, node_id)
             logger.info(f"Node {db_node.name} unpaused - triggering immediate check")
         elif not will_be_enabled and (not was_paused):
             # Ensure group is loaded
@@ -186,7 +196,7 @@ def delete_node(node_id: str, request: Request, db: Session = Depends(get_db)):
     db.commit()
     
     # Sync to config.json
-    save_config(db)
+    request_save_config()
     
     # Remove from Pinger Cache immediately
     if hasattr(request.app.state, "pinger"):
@@ -196,27 +206,35 @@ def delete_node(node_id: str, request: Request, db: Session = Depends(get_db)):
 
 # --- APP CONFIG ---
 
+REDACTED = "***REDACTED***"
+
+# Secret fields masked in API responses: section -> keys
+SECRET_FIELDS = {
+    "influxdb": ("token",),
+    "pushover": ("token", "user_key"),
+}
+
+def _redact_app_config(config: dict) -> dict:
+    """Copy of config with secrets masked; only the sections holding secrets are copied"""
+    redacted = dict(config)
+    for section, keys in SECRET_FIELDS.items():
+        values = redacted.get(section)
+        if not isinstance(values, dict) or not any(values.get(key) for key in keys):
+            continue
+        values = redacted[section] = dict(values)
+        for key in keys:
+            if values.get(key):
+                values[key] = REDACTED
+    return redacted
+
 @router.get("/app")
 def get_app_config():
     """Get current application configuration with masked secrets"""
     try:
         from storage import storage
-        import copy
         
-        # Deep copy to avoid modifying original
-        config = copy.deepcopy(storage.config)
-        
-        # Mask sensitive data
-        if "influxdb" in config and "token" in config["influxdb"]:
-            token = config["influxdb"]["token"]
-            if token and len(token) > 0:
-                config["influxdb"]["token"] = "***REDACTED***"
-
-        if "pushover" in config:
-            if "token" in config["pushover"] and config["pushover"]["token"]:
-                config["pushover"]["token"] = "***REDACTED***"
-            if "user_key" in config["pushover"] and config["pushover"]["user_key"]:
-                config["pushover"]["user_key"] = "***REDACTED***"
+        # Shallow copies only: the original config is never modified
+        config = _redact_app_config(storage.config)
         
         logger.debug("App config fetched successfully")
         return config
@@ -235,14 +253,14 @@ def update_app_config(config: dict, request: Request):
         current_config = storage.config
         
         # InfluxDB
-        if "influxdb" in config and config["influxdb"].get("token") == "***REDACTED***":
+        if "influxdb" in config and config["influxdb"].get("token") == REDACTED:
             config["influxdb"]["token"] = current_config.get("influxdb", {}).get("token", "")
             
         # Pushover
         if "pushover" in config:
-            if config["pushover"].get("token") == "***REDACTED***":
+            if config["pushover"].get("token") == REDACTED:
                  config["pushover"]["token"] = current_config.get("pushover", {}).get("token", "")
-            if config["pushover"].get("user_key") == "***REDACTED***":
+            if config["pushover"].get("user_key") == REDACTED:
                  config["pushover"]["user_key"] = current_config.get("pushover", {}).get("user_key", "")
 
         # Save to file
@@ -1,14 +1,13 @@
 
 import logging
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request
 from pydantic import BaseModel
 from typing import List, Optional
-import ipaddress
-from discovery_engine import discovery_engine
+from discovery_engine import discovery_engine, parse_cidr
 from sqlalchemy.orm import Session
 from database import get_db
 from models import NodeDB, GroupDB
-from utils import save_config
+from utils import request_save_config
 
 logger = logging.getLogger("BeamState.DiscoveryRouter")
 
@@ -33,7 +32,7 @@ async def start_scan(request: ScanRequest):
     """Start a network scan"""
     try:
         # Validate CIDR
-        ipaddress.ip_network(request.cidr)
+        parse_cidr(request.cidr)
         
         # Check if already running
         if discovery_engine._scan_running:
@@ -72,7 +71,7 @@ class ImportRequest(BaseModel):
     protocols: List[str] = ["icmp", "snmp"]
 
 @router.post("/import")
-def import_nodes(request: ImportRequest, db: Session = Depends(get_db)):
+def import_nodes(request: ImportRequest, http_request: Request, db: Session = Depends(get_db)):
     """Import discovered nodes into configuration"""
     
     # Verify group exists
@@ -88,9 +87,17 @@ def import_nodes(request: ImportRequest, db: Session = Depends(get_db)):
     use_snmp = "snmp" in request.protocols
     
     try:
+        # Look up every already-configured IP in one query instead of one per host
+        requested_ips = list({host.ip for host in request.hosts})
+        existing_by_ip = {}
+        if requested_ips:
+            for node in db.query(NodeDB).filter(NodeDB.ip.in_(requested_ips)).all():
+                existing_by_ip.setdefault(node.ip, node)
+        new_nodes = []
+        
         for host in request.hosts:
             # Check if node IP already exists
-            existing = db.query(NodeDB).filter(NodeDB.ip == host.ip).first()
+            existing = existing_by_ip.get(host.ip)
             
             if existing:
                 # Merge: Update existing node with new protocol info
@@ -136,12 +143,17 @@ def import_nodes(request: ImportRequest, db: Session = Depends(get_db)):
                     snmp_community=host.community or "public",
                     enabled=True
                 )
-                db.add(new_node)
+                new_nodes.append(new_node)
+                # A repeated IP later in the same request merges into this node
+                existing_by_ip[host.ip] = new_node
                 imported_count += 1
             
+        db.add_all(new_nodes)
         db.commit()
         if imported_count > 0 or updated_count > 0:
-            save_config(db)
+            request_save_config()
+            if hasattr(http_request.app.state, "pinger"):
+                http_request.app.state.pinger.invalidate_nodes()
             
         logger.info(f"Import complete: {imported_count} new, {updated_count} updated")
         return {
@@ -1,17 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Dict, Optional
 from database import get_db
 from models import MetricDefinition, MetricDefinitionDB, NodeMetric, NodeMetricCreate, NodeMetricDB, NodeDB, NodeInterface, NodeInterfaceDB, NodeInterfaceBase
-# Note: pysnmp imports are done inside _sync_discover_interfaces to avoid async/sync conflicts
+# Note: pysnmp imports are done inside _discover_interfaces to keep router import cheap
+import threading
+import time
 import uuid
 import logging
-import asyncio
 
 logger = logging.getLogger("BeamState.Metrics")
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
+# Rows requested per GETBULK during interface discovery
+BULK_MAX_REPETITIONS = 25
+
+# ifEntry columns read during interface discovery: (column OID, field name)
+INTERFACE_COLUMNS = [
+    ('1.3.6.1.2.1.2.2.1.2', 'name'),          # ifDescr
+    ('1.3.6.1.2.1.2.2.1.3', 'type'),          # ifType
+    ('1.3.6.1.2.1.2.2.1.6', 'mac_address'),   # ifPhysAddress
+    ('1.3.6.1.2.1.2.2.1.7', 'admin_status'),  # ifAdminStatus
+    ('1.3.6.1.2.1.2.2.1.8', 'oper_status'),   # ifOperStatus
+]
+
+# Column OIDs as sub-identifier tuples, parsed once: prefix checks are plain tuple compares
+INTERFACE_COLUMN_TUPLES = [
+    (tuple(int(part) for part in oid.split(".")), key_name) for oid, key_name in INTERFACE_COLUMNS
+]
+
+# Interface columns refreshed on rediscovery (id, alias and enabled are left alone)
+DISCOVERED_INTERFACE_FIELDS = ["name", "type", "mac_address", "admin_status", "oper_status"]
+
+# Metric definitions are seeded at startup and rarely change, so listings are cached per
+# (device_type, search) for a short while: {key: (expires_at, definitions)}
+DEFINITIONS_CACHE_TTL = 60.0
+DEFINITIONS_CACHE_MAX_ENTRIES = 256
+_definitions_cache: Dict[tuple, tuple] = {}
+_definitions_cache_lock = threading.Lock()
+
 
 # --- METRIC DEFINITIONS ---
 
@@ -21,6 +50,13 @@ def read_metric_definitions(
     search: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
+    key = (device_type, search)
+    now = time.monotonic()
+    with _definitions_cache_lock:
+        cached = _definitions_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    
     query = db.query(MetricDefinitionDB)
     
     if device_type:
@@ -29,7 +65,12 @@ def read_metric_definitions(
     if search:
         query = query.filter(MetricDefinitionDB.name.contains(search))
         
-    return query.all()
+    definitions = [MetricDefinition.model_validate(d) for d in query.all()]
+    with _definitions_cache_lock:
+        if len(_definitions_cache) >= DEFINITIONS_CACHE_MAX_ENTRIES:
+            _definitions_cache.clear()
+        _definitions_cache[key] = (now + DEFINITIONS_CACHE_TTL, definitions)
+    return definitions
 
 # --- NODE METRICS Configuration ---
 
@@ -39,14 +80,15 @@ def read_node_metrics(node_id: str, db: Session = Depends(get_db)):
     return db.query(NodeMetricDB).filter(NodeMetricDB.node_id == node_id).all()
 
 @router.post("/nodes/{node_id}", response_model=List[NodeMetric])
-def set_node_metrics(node_id: str, metrics: List[NodeMetricCreate], db: Session = Depends(get_db)):
+def set_node_metrics(node_id: str, metrics: List[NodeMetricCreate], request: Request, db: Session = Depends(get_db)):
     """Set configured metrics for a node (replaces existing configuration)"""
     # Verify node exists
     node = db.query(NodeDB).filter(NodeDB.id == node_id).first()
     if not node:
         raise HTTPException(status_code=404, detail="Node not found")
         
-    # Delete existing metrics
+    # Delete existing metrics (remember IDs so their cached values can be evicted)
+    old_metric_ids = [row.id for row in db.query(NodeMetricDB.id).filter(NodeMetricDB.node_id == node_id).all()]
     db.query(NodeMetricDB).filter(NodeMetricDB.node_id == node_id).delete()
     
     new_metrics = []
@@ -55,65 +97,75 @@ def set_node_metrics(node_id: str, metrics: List[NodeMetricCreate], db: Session
         # Ensure ID is new
         metric_db.id = str(uuid.uuid4())
         metric_db.node_id = node_id  # Ensure node_id is set
-        db.add(metric_db)
         new_metrics.append(metric_db)
         
+    db.add_all(new_metrics)
     db.commit()
-    for m in new_metrics:
-        db.refresh(m)
+    
+    # Replaced metrics get new IDs, so evict the old entries from the in-memory caches
+    if hasattr(request.app.state, "pinger"):
+        request.app.state.pinger.snmp_collector.forget_metrics(node_id, old_metric_ids)
+        request.app.state.pinger.invalidate_nodes([node_id])
         
     return new_metrics
 
 # --- INTERFACE DISCOVERY ---
 
-def _sync_discover_interfaces(ip: str, port: int, community: str) -> list:
-    """Synchronous SNMP interface discovery - runs in thread pool"""
-    from pysnmp.hlapi import (
-        SnmpEngine, CommunityData, UdpTransportTarget, ContextData,
-        ObjectType, ObjectIdentity, nextCmd
-    )
+async def _discover_interfaces(ip: str, port: int, community: str) -> list:
+    """SNMP interface discovery on the asyncio engine (no worker thread needed)"""
+    from pysnmp.hlapi.asyncio import CommunityData, ContextData, ObjectType, ObjectIdentity, bulkCmd
+    from pysnmp.proto.rfc1902 import ObjectName
+    from pysnmp.proto.rfc1905 import EndOfMibView, NoSuchInstance, NoSuchObject
+    from monitors.snmp_common import get_snmp_engine, get_transport
     
     interfaces = {}
     
-    # helper to fetch a column
-    def fetch_column(oid_base, key_name):
-        for errorIndication, errorStatus, errorIndex, varBinds in nextCmd(
-            SnmpEngine(),
-            CommunityData(community, mpModel=1),  # v2c
-            UdpTransportTarget((ip, port), timeout=2.0, retries=1),
-            ContextData(),
-            ObjectType(ObjectIdentity(oid_base)),
-            lexicographicMode=False
-        ):
-            if errorIndication or errorStatus:
-                continue # Skip errors for secondary columns to be safe
-            
-            for varBind in varBinds:
-                oid = varBind[0]
-                val = varBind[1]
+    snmp_engine = get_snmp_engine()
+    auth = CommunityData(community, mpModel=1)  # v2c
+    target = get_transport(ip, port, 2.0, 1)
+    context = ContextData()
+    
+    # All five ifEntry columns are walked side by side: each GETBULK row carries one varbind per column.
+    # Each column continues from the last OID it returned until it runs off its own subtree.
+    cursors = [(column_oid, ObjectName(column_oid), key_name) for column_oid, key_name in INTERFACE_COLUMN_TUPLES]
+    while cursors:
+        errorIndication, errorStatus, errorIndex, varBindTable = await bulkCmd(
+            snmp_engine,
+            auth,
+            target,
+            context,
+            0, BULK_MAX_REPETITIONS,
+            *[ObjectType(ObjectIdentity(cursor)) for _, cursor, _ in cursors],
+            lookupMib=False
+        )
+        if errorIndication or errorStatus or not varBindTable:
+            break
+        
+        advanced = []
+        for position, (column_oid, cursor, key_name) in enumerate(cursors):
+            for row in varBindTable:
+                oid, val = row[position]
+                name = tuple(oid)
+                # A bulk response can run past the end of the agent's MIB,
+                # and a shorter column runs into its neighbour while the others continue
+                if isinstance(val, (EndOfMibView, NoSuchObject, NoSuchInstance)) or name[:len(column_oid)] != column_oid:
+                    cursor = None
+                    break
+                cursor = oid
+                # ifIndex is a single sub-identifier; anything longer is not an ifEntry row
+                if len(name) != len(column_oid) + 1:
+                    continue
+                idx = name[len(column_oid)]
+                if idx not in interfaces:
+                    interfaces[idx] = {"index": idx}
                 try:
-                    idx = int(oid[-1])
-                    if idx not in interfaces:
-                        interfaces[idx] = {"index": idx}
                     interfaces[idx][key_name] = val.prettyPrint()
                 except Exception:
                     pass
+            if cursor is not None:
+                advanced.append((column_oid, cursor, key_name))
+        cursors = advanced
 
-    # 1. Fetch ifDescr (Base)
-    fetch_column('1.3.6.1.2.1.2.2.1.2', 'name')
-    
-    # 2. Fetch ifType
-    fetch_column('1.3.6.1.2.1.2.2.1.3', 'type')
-    
-    # 3. Fetch ifPhysAddress
-    fetch_column('1.3.6.1.2.1.2.2.1.6', 'mac_address')
-    
-    # 4. Fetch ifAdminStatus
-    fetch_column('1.3.6.1.2.1.2.2.1.7', 'admin_status')
-    
-    # 5. Fetch ifOperStatus
-    fetch_column('1.3.6.1.2.1.2.2.1.8', 'oper_status')
-    
     # Convert dict to list
     result_list = sorted(interfaces.values(), key=lambda x: x["index"])
     return result_list
@@ -125,7 +177,8 @@ async def discover_interfaces(node_id: str, db: Session = Depends(get_db)):
     logger.info(f"Received discovery request for node {node_id}")
     
     try:
-        node = db.query(NodeDB).filter(NodeDB.id == node_id).first()
+        # The group supplies the SNMP defaults, so load it in the same query
+        node = db.query(NodeDB).options(joinedload(NodeDB.group)).filter(NodeDB.id == node_id).first()
         if not node:
             raise HTTPException(status_code=404, detail="Node not found")
         
@@ -141,57 +194,39 @@ async def discover_interfaces(node_id: str, db: Session = Depends(get_db)):
         
         logger.info(f"Targeting {node.ip}:{port} with v2c, community={community}")
 
-        # Run synchronous SNMP in thread pool to avoid asyncio issues
-        loop = asyncio.get_event_loop()
-        interfaces = await loop.run_in_executor(
-            None,  # Default executor
-            _sync_discover_interfaces,
-            node.ip, port, community
-        )
-        
-        # Persist interfaces to DB
-        # 1. Get existing interfaces
-        existing_interfaces = db.query(NodeInterfaceDB).filter(NodeInterfaceDB.node_id == node_id).all()
-        existing_map = {i.index: i for i in existing_interfaces}
-        
-        saved_interfaces = []
+        interfaces = await _discover_interfaces(node.ip, port, community)
         
-        for iface_data in interfaces:
-            idx = iface_data["index"]
-            name = iface_data.get("name")
-            if_type = iface_data.get("type")
-            mac = iface_data.get("mac_address")
-            admin_status = iface_data.get("admin_status")
-            oper_status = iface_data.get("oper_status")
-
-
-            if idx in existing_map:
-                # Update existing
-                db_iface = existing_map[idx]
-                db_iface.name = name
-                db_iface.type = if_type
-                db_iface.mac_address = mac
-                db_iface.admin_status = admin_status
-                db_iface.oper_status = oper_status
-                saved_interfaces.append(db_iface)
-            else:
-                # Create new
-                new_iface = NodeInterfaceDB(
-                    node_id=node_id,
-                    index=idx,
-                    name=name,
-                    type=if_type,
-                    mac_address=mac,
-                    admin_status=admin_status,
-                    oper_status=oper_status,
-                    enabled=False # User must manually enable
-                )
-                db.add(new_iface)
-                saved_interfaces.append(new_iface)
+        if not interfaces:
+            return []
         
+        # Persist interfaces to DB in one upsert: new rows start disabled (user must manually enable),
+        # existing rows keep their id, alias and enabled flag and get the fresh SNMP fields
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "node_id": node_id,
+                "index": iface_data["index"],
+                "name": iface_data.get("name"),
+                "type": iface_data.get("type"),
+                "mac_address": iface_data.get("mac_address"),
+                "admin_status": iface_data.get("admin_status"),
+                "oper_status": iface_data.get("oper_status"),
+                "enabled": False,
+            }
+            for iface_data in interfaces
+        ]
+        stmt = sqlite_insert(NodeInterfaceDB).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["node_id", "index"],
+            set_={field: stmt.excluded[field] for field in DISCOVERED_INTERFACE_FIELDS}
+        )
+        db.execute(stmt)
         db.commit()
         
-        return saved_interfaces
+        return db.query(NodeInterfaceDB).filter(
+            NodeInterfaceDB.node_id == node_id,
+            NodeInterfaceDB.index.in_([row["index"] for row in rows])
+        ).order_by(NodeInterfaceDB.index).all()
         
     except HTTPException:
         raise
@@ -217,12 +252,15 @@ def update_interface_config(node_id: str, config: List[NodeInterfaceBase], db: S
         
     logger.info(f"Processing interface config update for {node_id}")
     
+    # Load the node's interfaces once instead of one query per config entry
+    ifaces_by_index = {
+        iface.index: iface
+        for iface in db.query(NodeInterfaceDB).filter(NodeInterfaceDB.node_id == node_id).all()
+    }
+    
     for cfg in config:
         # Find interface
-        iface = db.query(NodeInterfaceDB).filter(
-            NodeInterfaceDB.node_id == node_id,
-            NodeInterfaceDB.index == cfg.index
-        ).first()
+        iface = ifaces_by_index.get(cfg.index)
         
         if iface:
             # Update Interface State
@@ -245,30 +283,12 @@ def update_interface_config(node_id: str, config: List[NodeInterfaceBase], db: S
 @router.get("/current")
 async def get_all_current_metrics(request: Request):
     """Get all current in-memory metric values"""
-    if hasattr(request.app.state, "pinger") and hasattr(request.app.state.pinger, "snmp_collector"):
-        return request.app.state.pinger.snmp_collector.get_current_values()
-    return {}
+    collector = request.app.state.snmp_collector
+    return collector.get_current_values() if collector else {}
 
 @router.get("/current/{node_id}")
 async def get_current_metrics(node_id: str, request: Request):
     """Get current in-memory metric values for a node"""
-    if hasattr(request.app.state, "pinger") and hasattr(request.app.state.pinger, "snmp_collector"):
-        collector = request.app.state.pinger.snmp_collector
-        
-        # Filter values for this node
-        all_values = collector.get_current_values()
-        
-        # We need to filter by node_id.
-        # Ideally, the collector would return {metric_id: value}
-        # But we need to know which metrics belong to this node.
-        # For simplicity, we'll return all values for now, but in future, filter.
-        # OR, better: The UI knows the metric IDs for the node, so it can just pick what it needs.
-        # But let's try to filter if possible.
-        
-        # Actually, let's just return the raw values map and let UI handle mapping
-        # since we don't have easy DB access here without dependency injection to query node_metrics again
-        # which would be slow for a high-frequency polling endpoint.
-        
-        return all_values
-        
-    return {}
+    collector = request.app.state.snmp_collector
+    # Values are kept per node, so this is a direct lookup
+    return collector.get_current_values(node_id) if collector else {}
@@ -2,7 +2,6 @@
 Trace Router - Endpoints for state change event streaming
 """
 import asyncio
-import json
 import logging
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
@@ -12,6 +11,9 @@ logger = logging.getLogger("BeamState.TraceRouter")
 
 router = APIRouter(prefix="/trace", tags=["trace"])
 
+# Max queued events sent in one SSE chunk; keeps a burst from delaying the first bytes
+SSE_BATCH_SIZE = 64
+
 
 @router.get("/events")
 async def get_recent_events(limit: int = 100):
@@ -34,9 +36,11 @@ async def stream_events(request: Request):
                 
                 try:
                     # Wait for event with timeout to check connection periodically
-                    event = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    data = json.dumps(event.to_dict())
-                    yield f"data: {data}\n\n"
+                    batch = [await asyncio.wait_for(queue.get(), timeout=30.0)]
+                    # Coalesce whatever else is already queued into the same write
+                    while len(batch) < SSE_BATCH_SIZE and not queue.empty():
+                        batch.append(queue.get_nowait())
+                    yield "".join(f"data: {data}\n\n" for data in batch)
                 except asyncio.TimeoutError:
                     # Send keepalive
                     yield f": keepalive\n\n"
@@ -9,13 +9,19 @@ logger = logging.getLogger("BeamState.SeedMetrics")
 
 import json
 import os
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def _parse_metrics_file(file_path: str, mtime_ns: int):
+    """Parse snmp.json once per file version (the mtime is part of the cache key)"""
+    with open(file_path, "rb") as f:
+        return json.loads(f.read())
 
 def load_metrics_from_file():
     """Load metrics from snmp.json"""
     file_path = os.path.join(os.path.dirname(__file__), "snmp.json")
     try:
-        with open(file_path, "r") as f:
-            return json.load(f)
+        return _parse_metrics_file(file_path, os.stat(file_path).st_mtime_ns)
     except FileNotFoundError:
         logger.error(f"snmp.json not found at {file_path}")
         return []
@@ -23,6 +29,30 @@ def load_metrics_from_file():
         logger.error(f"Error parsing snmp.json: {e}")
         return []
 
+# Internal ICMP metrics
+ICMP_METRICS = [
+    {
+        "name": "ICMP Latency",
+        "oid_template": "internal.icmp.latency", # Placeholder, not used for SNMP
+        "metric_type": "gauge",
+        "unit": "ms",
+        "category": "system",
+        "device_type": "generic",
+        "metric_source": "icmp",
+        "requires_index": False
+    },
+    {
+        "name": "ICMP Packet Loss",
+        "oid_template": "internal.icmp.loss",
+        "metric_type": "gauge",
+        "unit": "percent",
+        "category": "system",
+        "device_type": "generic",
+        "metric_source": "icmp",
+        "requires_index": False
+    }
+]
+
 def seed_metric_definitions():
     """Seed the database with default metric definitions from file"""
     db = SessionLocal()
@@ -30,15 +60,19 @@ def seed_metric_definitions():
         count = 0
         metrics_data = load_metrics_from_file()
         
+        # Fetch every definition we might touch in one query
+        names = [m["name"] for m in metrics_data] + [m["name"] for m in ICMP_METRICS]
+        existing_by_name = {
+            m.name: m for m in db.query(MetricDefinitionDB).filter(MetricDefinitionDB.name.in_(names)).all()
+        }
+        
         # Add default metrics if they don't exist, or update if changed
+        new_metrics = []
         for metric_data in metrics_data:
-            existing = db.query(MetricDefinitionDB).filter(
-                MetricDefinitionDB.name == metric_data["name"]
-            ).first()
+            existing = existing_by_name.get(metric_data["name"])
             
             if not existing:
-                metric = MetricDefinitionDB(**metric_data)
-                db.add(metric)
+                new_metrics.append(MetricDefinitionDB(**metric_data))
                 count += 1
                 logger.info(f"Adding new metric definition: {metric_data['name']}")
             else:
@@ -56,38 +90,14 @@ def seed_metric_definitions():
                     logger.info(f"Updated metric definition: {metric_data['name']}")
         
         # Add internal ICMP metrics
-        icmp_metrics = [
-            {
-                "name": "ICMP Latency",
-                "oid_template": "internal.icmp.latency", # Placeholder, not used for SNMP
-                "metric_type": "gauge",
-                "unit": "ms",
-                "category": "system",
-                "device_type": "generic",
-                "metric_source": "icmp",
-                "requires_index": False
-            },
-            {
-                "name": "ICMP Packet Loss",
-                "oid_template": "internal.icmp.loss",
-                "metric_type": "gauge",
-                "unit": "percent",
-                "category": "system",
-                "device_type": "generic",
-                "metric_source": "icmp",
-                "requires_index": False
-            }
-        ]
-        
-        for m_data in icmp_metrics:
-            existing = db.query(MetricDefinitionDB).filter(MetricDefinitionDB.name == m_data["name"]).first()
-            if not existing:
-                metric = MetricDefinitionDB(**m_data)
-                db.add(metric)
+        for m_data in ICMP_METRICS:
+            if m_data["name"] not in existing_by_name:
+                new_metrics.append(MetricDefinitionDB(**m_data))
                 count += 1
                 logger.info(f"Adding new ICMP metric: {m_data['name']}")
         
         if count > 0:
+            db.add_all(new_metrics)
             db.commit()
             logger.info(f"Seeded {count} new metric definitions")
         else:
@@ -2,23 +2,273 @@ import os
 import json
 import logging
 import asyncio
-import aiofiles
 import pathlib
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from influxdb_client import InfluxDBClient, Point
-from influxdb_client.client.write_api import ASYNCHRONOUS
+from functools import lru_cache
+from typing import Any, Deque, List, Mapping, NamedTuple, Optional, TextIO, Tuple
+from influxdb_client import InfluxDBClient, WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
 
 logger = logging.getLogger("BeamState.Storage")
 
 CONFIG_FILE = pathlib.Path(__file__).parent / "config.json"
 
+
+# Most log entries written to the log file in one append
+LOG_BATCH_SIZE = 256
+# Write buffer of the long-lived log file handle (flushed once per batch)
+LOG_WRITE_BUFFER = 1 << 16
+
+
+# (metric_name, value, unit, interface, metric_type) as taken by write_snmp_metrics
+SnmpMetricValue = Tuple[str, Any, Optional[str], Optional[str], str]
+
+
+class PushoverSettings(NamedTuple):
+    """Typed snapshot of the "pushover" config section"""
+    enabled: bool
+    token: str
+    user_key: str
+    priority: int
+    message_template: str
+    throttling_enabled: bool
+    alert_threshold: int
+    alert_window: int
+    maintenance_mode: bool
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+# Line-protocol escaping for tag keys/values (same rules as influxdb_client's Point)
+_TAG_ESCAPE = str.maketrans({
+    ",": r"\,", " ": r"\ ", "=": r"\=", "\n": r"\n", "\r": r"\r", "\t": r"\t"
+})
+
+
+def _tag_value(value: Any) -> str:
+    """Escape a tag value; one ending in a backslash gets a trailing space, as Point does"""
+    escaped = str(value).translate(_TAG_ESCAPE)
+    return escaped + " " if escaped.endswith("\\") else escaped
+
+
+def _float_field(value: float) -> str:
+    """Float field value as Point writes it (whole numbers without the trailing .0)"""
+    text = repr(value)
+    return text[:-2] if text.endswith(".0") else text
+
+
+@lru_cache(maxsize=4096)
+def _snmp_series(node_name: str, ip: str, group_name: str, metric_name: str,
+                 unit: Optional[str], interface: Optional[str], metric_type: Optional[str]) -> str:
+    """Measurement plus tag set for an SNMP metric series, tags sorted by key"""
+    tags = (
+        ("group", group_name),
+        ("interface", interface),
+        ("ip", ip),
+        ("metric", metric_name),
+        ("node", node_name),
+        ("type", metric_type),
+        ("unit", unit),
+    )
+    return "snmp_metrics," + ",".join(
+        f"{key}={_tag_value(value)}" for key, value in tags if value
+    )
+
+
+# Failed batches are retried this many times, then dropped. The first retry waits
+# INFLUX_RETRY_INTERVAL seconds; each later one waits twice as long, up to INFLUX_MAX_RETRY_DELAY.
+INFLUX_MAX_RETRIES = 3
+INFLUX_RETRY_INTERVAL = 5.0
+INFLUX_MAX_RETRY_DELAY = 30.0
+
+
+def _write_batch(write_api, bucket: str, org: str, batch: List[str]):
+    """Send one batch of line-protocol records, retrying failures (runs on BatchingWriter's thread)"""
+    for attempt in range(INFLUX_MAX_RETRIES + 1):
+        try:
+            write_api.write(bucket=bucket, org=org, record=batch, write_precision=WritePrecision.S)
+            return
+        except Exception as e:
+            if attempt == INFLUX_MAX_RETRIES:
+                logger.error(f"Error writing batch of {len(batch)} points to InfluxDB, dropping it: {e}")
+                return
+            delay = min(INFLUX_RETRY_INTERVAL * 2 ** attempt, INFLUX_MAX_RETRY_DELAY)
+            logger.warning(f"Retrying InfluxDB write in {delay}s: {e}")
+            time.sleep(delay)
+
+
+def _close_client(write_api, client):
+    """Close a replaced InfluxDB client (runs on BatchingWriter's thread, after its last batch)"""
+    try:
+        write_api.close()
+        client.close()
+    except Exception as e:
+        logger.error(f"Storage: Error closing InfluxDB client: {e}")
+
+
+@lru_cache(maxsize=8)
+def _log_file_path(file_path: str) -> pathlib.Path:
+    """Resolve the configured log path; relative paths are relative to the backend/ directory"""
+    log_path = pathlib.Path(file_path)
+    if not log_path.is_absolute():
+        log_path = pathlib.Path(__file__).parent / log_path
+    return log_path
+
+
+def _read_last_lines(path: pathlib.Path, count: int, block_size: int = 1 << 16):
+    """
+    Last `count` lines of a text file, read backwards from the end in blocks so
+    only the tail is loaded. Returns (lines, truncated) where truncated tells
+    whether the file holds more lines than were returned.
+    """
+    with open(path, mode='rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # count + 1 newlines guarantee `count` complete lines (the file ends with a newline)
+        while pos > 0 and data.count(b"\n") <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    if count <= 0:
+        return [], bool(lines)
+    return lines[-count:], pos > 0 or len(lines) > count
+
+
+def _format_responses(responses) -> Tuple[str, list]:
+    """
+    Format raw ping3 responses (seconds, None on timeout, False on error) in one pass.
+    Returns the comma-joined text for InfluxDB ("12.5ms,timeout") and the list for
+    the JSON log (12.5, "timeout").
+    """
+    text, values = [], []
+    for resp in responses:
+        if isinstance(resp, float):
+            value = round(resp * 1000, 2)  # Convert to ms
+            text.append(f"{value}ms")
+        else:
+            # bool before anything int-like: only False is a ping3 result
+            if resp is None:
+                value = "timeout"
+            elif isinstance(resp, bool) and not resp:
+                value = "error"
+            else:
+                value = str(resp)
+            text.append(value)
+        values.append(value)
+    return ",".join(text), values
+
+
+# Line-protocol escaping for string field values
+_FIELD_STRING_ESCAPE = str.maketrans({"\\": "\\\\", '"': '\\"'})
+
+
+@lru_cache(maxsize=4096)
+def _monitoring_series(node_name: str, ip: str, group_name: str, protocol: str) -> str:
+    """Measurement plus tag set for a monitor result series, tags sorted by key"""
+    tags = (
+        ("group", group_name),
+        ("ip", ip),
+        ("node", node_name),
+        ("protocol", protocol),
+    )
+    return "monitoring," + ",".join(
+        f"{key}={_tag_value(value)}" for key, value in tags if value
+    )
+
+
+class BatchingWriter:
+    """
+    Buffers InfluxDB line-protocol records and writes them in batches.
+    
+    A batch is sent once max_batch records are queued or every flush_interval
+    seconds, whichever comes first. Records carry their own second-precision
+    timestamp, so the delay does not shift the stored time. Batches are sent
+    by a single thread, in order, so the event loop never waits on InfluxDB.
+    """
+    def __init__(self, storage: "Storage", max_batch: int = 5000, flush_interval: float = 5.0):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.queue: Deque[str] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="influx-writer")
+
+    def add(self, record: str):
+        """Queue a line-protocol record; must be called from the event loop"""
+        self.queue.append(record)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+        if len(self.queue) >= self.max_batch:
+            self._write_pending()
+
+    def add_many(self, records: List[str]):
+        """Queue several line-protocol records at once; must be called from the event loop"""
+        self.queue.extend(records)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+        if len(self.queue) >= self.max_batch:
+            self._write_pending()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._write_pending()
+
+    def _write_pending(self):
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(len(self.queue), self.max_batch))]
+            write_api = self.storage.write_api
+            if write_api is None:
+                # InfluxDB was disabled since these were queued
+                self.queue.clear()
+                return
+            influx_conf = self.storage.config["influxdb"]
+            self.executor.submit(_write_batch, write_api, influx_conf["bucket"], influx_conf["org"], batch)
+
+    async def flush(self):
+        """Stop the timer and hand everything still queued to the writer thread"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._write_pending()
+
+
 class Storage:
     def __init__(self):
-        self._file_lock = asyncio.Lock()
+        # Log entries are queued by producers and written by a single background task
+        self._log_queue: asyncio.Queue = asyncio.Queue()
+        self._log_task: Optional[asyncio.Task] = None
+        # One thread owns the log file handle, so writes never interleave
+        self._log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-writer")
+        self._log_fp: Optional[TextIO] = None
+        # Last retention_lines log lines as written, so trimming the file never re-reads it
+        self._log_path: Optional[pathlib.Path] = None
+        self._log_tail: Deque[str] = deque()
+        self._log_file_lines = 0
+        self.client = None
+        self.write_api = None
+        self.writer = BatchingWriter(self)
+        # Bumped on every reload so derived views (e.g. get_pushover) know when to rebuild
+        self.config_version = 0
+        self._pushover_cache: Optional[PushoverSettings] = None
+        self._pushover_version = -1
         self.reload_config()
 
     def reload_config(self):
         """Load configuration from config.json"""
+        self.config_version += 1
         self.config = {
             "influxdb": {
                 "enabled": False,
@@ -62,15 +312,18 @@ class Storage:
                         if "pushover" in app_config:
                             self.config["pushover"].update(app_config["pushover"])
                             
-            # Setup InfluxDB
+            # Setup InfluxDB (the previous client is closed once its pending batches are sent)
+            self._close_influx()
             influx_conf = self.config["influxdb"]
             if influx_conf["enabled"] and influx_conf["url"] and influx_conf["token"]:
+                # Batches are gzip-compressed on the wire
                 self.client = InfluxDBClient(
                     url=influx_conf["url"], 
                     token=influx_conf["token"], 
-                    org=influx_conf["org"]
+                    org=influx_conf["org"],
+                    enable_gzip=True
                 )
-                self.write_api = self.client.write_api(write_options=ASYNCHRONOUS)
+                self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
                 self.use_influx = True
                 logger.info(f"Storage: InfluxDB ENABLED ({influx_conf['url']})")
             else:
@@ -83,6 +336,43 @@ class Storage:
             logger.error(f"Storage: Failed to load config: {e}")
             self.use_influx = False
 
+    def _close_influx(self):
+        """Close the write API and client after the batches already handed to them"""
+        if self.client is not None:
+            self.writer.executor.submit(_close_client, self.write_api, self.client)
+        self.write_api = None
+        self.client = None
+
+    async def close(self):
+        """Flush buffered points and log entries and close the InfluxDB client (call on shutdown)"""
+        await self.writer.flush()
+        if self._log_task is not None:
+            await self._log_queue.join()
+            self._log_task.cancel()
+            self._log_task = None
+        await asyncio.get_running_loop().run_in_executor(self._log_executor, self._close_log)
+        self._close_influx()
+        # Wait for the writer thread to send the last batches and close the client
+        await asyncio.get_running_loop().run_in_executor(None, self.writer.executor.shutdown)
+
+    def get_pushover(self) -> PushoverSettings:
+        """Pushover settings, rebuilt only when the config has been reloaded"""
+        if self._pushover_version != self.config_version:
+            p = self.config.get("pushover", {})
+            self._pushover_cache = PushoverSettings(
+                enabled=bool(p.get("enabled", False)),
+                token=p.get("token") or "",
+                user_key=p.get("user_key") or "",
+                priority=_as_int(p.get("priority", 0), 0),
+                message_template=p.get("message_template") or "Node {name} ({ip}) is DOWN",
+                throttling_enabled=bool(p.get("throttling_enabled", False)),
+                alert_threshold=_as_int(p.get("alert_threshold", 5), 5),
+                alert_window=_as_int(p.get("alert_window", 60), 60),
+                maintenance_mode=bool(p.get("maintenance_mode", False))
+            )
+            self._pushover_version = self.config_version
+        return self._pushover_cache
+
     async def write_snmp_metric(
         self,
         node_name: str,
@@ -95,31 +385,29 @@ class Storage:
         metric_type: str = "gauge"
     ):
         """Write specific SNMP metric to storage"""
+        await self.write_snmp_metrics(node_name, ip, group_name, [(metric_name, value, unit, interface, metric_type)])
+
+    async def write_snmp_metrics(self, node_name: str, ip: str, group_name: str, metrics: List[SnmpMetricValue]):
+        """Write several SNMP metrics of one node, stamped with the same time"""
         if not self.use_influx:
             return
 
-        try:
-            point = (
-                Point("snmp_metrics")
-                .tag("node", node_name)
-                .tag("ip", ip)
-                .tag("group", group_name)
-                .tag("metric", metric_name)
-                .field("value", float(value))
-            )
-            
-            if unit:
-                point.tag("unit", unit)
-            if interface:
-                point.tag("interface", interface)
-            if metric_type:
-                point.tag("type", metric_type)
-            
-            # Write asynchronously
-            self.write_api.write(bucket=self.config["influxdb"]["bucket"], org=self.config["influxdb"]["org"], record=point)
-            
-        except Exception as e:
-            logger.error(f"Error writing SNMP metric: {e}")
+        timestamp = int(time.time())
+        lines = []
+        for metric_name, value, unit, interface, metric_type in metrics:
+            try:
+                value = float(value)
+                if not math.isfinite(value):
+                    continue
+                # Series key is cached - the same tag sets repeat every collection cycle
+                series = _snmp_series(node_name, ip, group_name, metric_name, unit, interface, metric_type)
+                lines.append(f"{series} value={_float_field(value)} {timestamp}")
+            except Exception as e:
+                logger.error(f"Error writing SNMP metric: {e}")
+        
+        # Queued and written in batches
+        if lines:
+            self.writer.add_many(lines)
 
     async def write_monitor_result(
         self, 
@@ -130,109 +418,167 @@ class Storage:
         latency: float, 
         status: str,
         success: bool,
-        raw_data: dict
+        raw_data: Mapping[str, Any],
+        timestamp: Optional[float] = None
     ):
         """
         Write monitoring result to storage.
         """
-        # Explicit format to ensure local time is clear
-        timestamp = datetime.now()
-        timestamp_str = timestamp.strftime("%Y-%m-%dT%H:%M:%S.%f")
-        
-        # 1. Write to InfluxDB if enabled
-        if self.use_influx:
-            try:
-                # Format raw responses for InfluxDB
-                response_str = ""
-                if protocol == "icmp" and "responses" in raw_data:
-                    formatted = []
-                    for resp in raw_data["responses"]:
-                        if isinstance(resp, float):
-                            formatted.append(f"{round(resp * 1000, 2)}ms")
-                        elif resp is None:
-                            formatted.append("timeout")
-                        elif resp is False:
-                            formatted.append("error")
-                        else:
-                            formatted.append(str(resp))
-                    response_str = ",".join(formatted)
-                
-                influx_conf = self.config["influxdb"]
-                point = (
-                    Point("monitoring")
-                    .tag("node", node_name)
-                    .tag("ip", ip)
-                    .tag("group", group_name)
-                    # Status is now a field, not a tag, to prevent series fragmentation
-                    .field("status_text", status)
-                    .tag("protocol", protocol)
-                    .field("latency", float(latency) if latency is not None else 0.0)
-                    .field("packet_loss", float(raw_data.get("packet_loss", 0.0)))
-                    .field("status_code", 1 if status in ["UP", "PAUSED"] else 0)
-                    .field("success", 1 if success else 0)
-                    .field("responses", response_str if response_str else "none")
-                )
-                self.write_api.write(bucket=influx_conf["bucket"], org=influx_conf["org"], record=point)
-            except Exception as e:
-                logger.error(f"Error writing to InfluxDB: {e}")
-        
-        # 2. Write to Log File if enabled
+        await self.write_monitor_results([dict(
+            node_name=node_name,
+            ip=ip,
+            group_name=group_name,
+            protocol=protocol,
+            latency=latency,
+            status=status,
+            success=success,
+            raw_data=raw_data,
+            timestamp=timestamp
+        )])
+
+    async def write_monitor_results(self, records: List[Mapping[str, Any]]):
+        """
+        Write a batch of monitoring results (keyword dicts as taken by write_monitor_result).
+        Log file entries are queued; a background task appends everything pending in one write.
+        """
         log_conf = self.config["logging"]
-        if log_conf["file_enabled"]:
-            # Format raw responses for JSON serialization
-            formatted_responses = []
-            if protocol == "icmp" and "responses" in raw_data:
-                for resp in raw_data["responses"]:
-                    if isinstance(resp, float):
-                        formatted_responses.append(round(resp * 1000, 2))  # Convert to ms
-                    elif resp is None:
-                        formatted_responses.append("timeout")
-                    elif resp is False:
-                        formatted_responses.append("error")
-                    else:
-                        formatted_responses.append(str(resp))
-            
-            entry = {
-                "timestamp": timestamp_str,
-                "node": node_name,
-                "ip": ip,
-                "group": group_name,
-                "protocol": protocol,
-                "latency": round(latency, 2) if latency is not None else None,
-                "packet_loss": raw_data.get("packet_loss", 0.0),
-                "status": status,
-                "success": success,
-                "ping_responses": formatted_responses if formatted_responses else None
-            }
+        log_entries = []
+        
+        for record in records:
+            protocol = record["protocol"]
+            raw_data = record["raw_data"]
+            latency = record["latency"]
+            status = record["status"]
+            # Epoch seconds; only the log file needs it as a (local time) datetime
+            timestamp = record.get("timestamp") or time.time()
             
-            # Use configurable path
-            # If path is relative, make it relative to backend/ directory
-            log_path = pathlib.Path(log_conf["file_path"])
-            if not log_path.is_absolute():
-                log_path = pathlib.Path(__file__).parent / log_path
-                
-            log_path.parent.mkdir(parents=True, exist_ok=True)
+            # Ping responses, formatted once for both outputs
+            response_str, formatted_responses = "", []
+            if protocol == "icmp" and "responses" in raw_data:
+                response_str, formatted_responses = _format_responses(raw_data["responses"])
             
-            async with self._file_lock:
+            # 1. Write to InfluxDB if enabled
+            if self.use_influx:
                 try:
-                    # Write new entry
-                    async with aiofiles.open(log_path, mode='a') as f:
-                        await f.write(json.dumps(entry) + "\n")
+                    # Status is a field, not a tag, to prevent series fragmentation
+                    series = _monitoring_series(record["node_name"], record["ip"], record["group_name"], protocol)
+                    # Fields sorted by key; non-finite floats are left out, as Point did
+                    fields = []
+                    latency_value = float(latency) if latency is not None else 0.0
+                    if math.isfinite(latency_value):
+                        fields.append(f"latency={_float_field(latency_value)}")
+                    packet_loss = float(raw_data.get("packet_loss", 0.0))
+                    if math.isfinite(packet_loss):
+                        fields.append(f"packet_loss={_float_field(packet_loss)}")
+                    fields += [
+                        f'responses="{(response_str or "none").translate(_FIELD_STRING_ESCAPE)}"',
+                        f'status_code={1 if status in ("UP", "PAUSED") else 0}i',
+                        f'status_text="{str(status).translate(_FIELD_STRING_ESCAPE)}"',
+                        f'success={1 if record["success"] else 0}i',
+                    ]
+                    self.writer.add(f"{series} {','.join(fields)} {int(timestamp)}")
                 except Exception as e:
-                    logger.error(f"Error writing to log file: {e}")
-                    return
-                
-                # Log rotation
-                max_lines = log_conf.get("retention_lines", 200)
-                try:
-                    async with aiofiles.open(log_path, mode='r') as f:
-                        lines = await f.readlines()
-                    if len(lines) > max_lines:
-                        async with aiofiles.open(log_path, mode='w') as f:
-                            await f.writelines(lines[-max_lines:])
-                            # logger.debug(f"Rotated log file: {len(lines)} -> {max_lines} lines")
-                except Exception as e:
-                    logger.debug(f"Log rotation skipped: {e}")
+                    logger.error(f"Error writing to InfluxDB: {e}")
+            
+            # 2. Collect log file entries if enabled
+            if log_conf["file_enabled"]:
+                log_entries.append({
+                    "timestamp": datetime.fromtimestamp(timestamp).isoformat(timespec="microseconds"),
+                    "node": record["node_name"],
+                    "ip": record["ip"],
+                    "group": record["group_name"],
+                    "protocol": protocol,
+                    "latency": round(latency, 2) if latency is not None else None,
+                    "packet_loss": raw_data.get("packet_loss", 0.0),
+                    "status": status,
+                    "success": record["success"],
+                    "ping_responses": formatted_responses if formatted_responses else None
+                })
+        
+        if log_entries:
+            for entry in log_entries:
+                self._log_queue.put_nowait(entry)
+            if self._log_task is None or self._log_task.done():
+                self._log_task = asyncio.create_task(self._log_flusher())
+
+    async def _log_flusher(self):
+        """Drain queued log entries, writing whatever has piled up in one append"""
+        while True:
+            batch = [await self._log_queue.get()]
+            while len(batch) < LOG_BATCH_SIZE and not self._log_queue.empty():
+                batch.append(self._log_queue.get_nowait())
+            try:
+                await self._append_log_entries(self.config["logging"], batch)
+            except Exception as e:
+                logger.error(f"Error writing to log file: {e}")
+            finally:
+                for _ in batch:
+                    self._log_queue.task_done()
+
+    async def _append_log_entries(self, log_conf: Mapping[str, Any], entries: List[dict]):
+        """Append entries to the JSON-lines log file and trim it to the retention limit"""
+        log_path = _log_file_path(log_conf["file_path"])
+        max_lines = log_conf.get("retention_lines", 200)
+        data = "".join(json.dumps(entry) + "\n" for entry in entries)
+        
+        # Only the log flusher task calls this, and all file work runs on the one log thread
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._log_executor, self._write_log, log_path, max_lines, data)
+
+    def _write_log(self, log_path: pathlib.Path, max_lines: int, data: str):
+        """Append to the log through the long-lived handle (runs on the log thread)"""
+        if log_path != self._log_path or self._log_tail.maxlen != max_lines:
+            self._open_log(log_path, max_lines)
+        
+        try:
+            # Write new entries; one flush per batch
+            self._log_fp.write(data)
+            self._log_fp.flush()
+        except Exception as e:
+            logger.error(f"Error writing to log file: {e}")
+            return
+        lines = data.splitlines(keepends=True)
+        self._log_tail.extend(lines)
+        self._log_file_lines += len(lines)
+        
+        # Log rotation: let the file grow to twice the retention, then rewrite it from
+        # the in-memory tail, so each appended entry costs a constant amount of I/O
+        if self._log_file_lines >= 2 * max_lines:
+            try:
+                self._log_fp.close()
+                with open(log_path, mode='w') as f:
+                    f.write("".join(self._log_tail))
+                self._log_file_lines = len(self._log_tail)
+            except Exception as e:
+                logger.debug(f"Log rotation skipped: {e}")
+            self._log_fp = open(log_path, mode='a', buffering=LOG_WRITE_BUFFER)
+
+    def _open_log(self, log_path: pathlib.Path, max_lines: int):
+        """Open the log for appending and seed the in-memory tail from its current contents
+        (on first write or a path/retention change)"""
+        self._close_log()
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        lines, truncated = [], False
+        try:
+            lines, truncated = _read_last_lines(log_path, max_lines)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug(f"Could not read existing log file: {e}")
+        self._log_fp = open(log_path, mode='a', buffering=LOG_WRITE_BUFFER)
+        self._log_path = log_path
+        self._log_tail = deque(lines, maxlen=max_lines)
+        # An over-long file is trimmed by the next write
+        self._log_file_lines = 2 * max_lines if truncated else len(lines)
+
+    def _close_log(self):
+        if self._log_fp is not None:
+            try:
+                self._log_fp.close()
+            except Exception as e:
+                logger.debug(f"Error closing log file: {e}")
+        self._log_fp = None
+        self._log_path = None
 
 # Global storage instance
 storage = Storage()
@@ -149,10 +149,10 @@ class TestMetricProcessor(unittest.IsolatedAsyncioTestCase):
         # But since we can't easily mock time inside the class without dependency injection of a clock,
         # we can manually inject previous value to test just the calc relative to "now".
         
-        processor.previous_values["test-metric-2"] = {
-            "value": 1000,
-            "timestamp": start_time - 1.0 # 1 second ago
-        }
+        processor.previous_values["test-metric-2"] = (
+            1000,
+            start_time - 1.0 # 1 second ago
+        )
         
         res2 = await processor.process_metric(node, metric, 2000)
         # Delta = 1000 bytes. Time = 1 sec.
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics_processor import MetricProcessor, compute_rate, counter_bits
+
+class TestCounterRate(unittest.TestCase):
+
+    def setUp(self):
+        self.processor = MetricProcessor(MagicMock())
+
+    def rate(self, prev, cur, bits=32):
+        self.processor.previous_values["m"] = (prev, 100.0)
+        return self.processor._calculate_rate("m", cur, 110.0, "count", bits)
+
+    def test_counter_width_from_oid(self):
+        self.assertEqual(counter_bits("1.3.6.1.2.1.31.1.1.1.6.{index}"), 64)
+        self.assertEqual(counter_bits("1.3.6.1.2.1.2.2.1.10.{index}"), 32)
+        self.assertEqual(counter_bits(None), 32)
+
+    def test_plain_delta(self):
+        self.assertEqual(self.rate(1000, 2000), 100.0)
+
+    def test_32bit_wrap(self):
+        self.assertEqual(self.rate(2**32 - 500, 500), 100.0)
+
+    def test_64bit_wrap(self):
+        self.assertEqual(self.rate(2**64 - 500, 500, bits=64), 100.0)
+
+    def test_compute_rate_edges(self):
+        self.assertEqual(compute_rate(2**32 - 1, 2**32 - 1, 5.0), 0.0)
+        self.assertIsNone(compute_rate(10, 5, 0.0))
+        self.assertIsNone(compute_rate(0, 2**31, 1.0))
+
+    def test_reset_is_dropped(self):
+        self.assertIsNone(self.rate(3_000_000, 10))
+        self.assertIsNone(self.rate(2**40, 10, bits=64))
+
+if __name__ == "__main__":
+    unittest.main()
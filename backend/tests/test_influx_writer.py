@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from storage import _write_batch, INFLUX_MAX_RETRIES, INFLUX_RETRY_INTERVAL, INFLUX_MAX_RETRY_DELAY
+
+BATCH = ["monitoring,node=n1 success=1i 1700000000"]
+
+class TestWriteBatch(unittest.TestCase):
+
+    @patch("storage.time.sleep")
+    def test_failed_write_is_retried(self, sleep):
+        write_api = MagicMock()
+        write_api.write.side_effect = [ConnectionError("timeout"), None]
+
+        _write_batch(write_api, "bucket", "org", BATCH)
+
+        self.assertEqual(write_api.write.call_count, 2)
+        self.assertEqual(write_api.write.call_args.kwargs["record"], BATCH)
+        sleep.assert_called_once()
+
+    @patch("storage.time.sleep")
+    def test_batch_dropped_after_last_attempt(self, sleep):
+        write_api = MagicMock()
+        write_api.write.side_effect = ConnectionError("down")
+
+        with self.assertLogs("BeamState.Storage", level="ERROR"):
+            _write_batch(write_api, "bucket", "org", BATCH)
+
+        self.assertEqual(write_api.write.call_count, INFLUX_MAX_RETRIES + 1)
+        self.assertEqual(sleep.call_count, INFLUX_MAX_RETRIES)
+
+    @patch("storage.INFLUX_MAX_RETRIES", 5)
+    @patch("storage.time.sleep")
+    def test_retry_delay_doubles_up_to_cap(self, sleep):
+        write_api = MagicMock()
+        write_api.write.side_effect = ConnectionError("down")
+
+        with self.assertLogs("BeamState.Storage", level="ERROR"):
+            _write_batch(write_api, "bucket", "org", BATCH)
+
+        delays = [c.args[0] for c in sleep.call_args_list]
+        self.assertEqual(delays[:2], [INFLUX_RETRY_INTERVAL, INFLUX_RETRY_INTERVAL * 2])
+        self.assertEqual(max(delays), INFLUX_MAX_RETRY_DELAY)
+        self.assertEqual(delays, sorted(delays))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from influxdb_client import Point, WritePrecision
+from storage import Storage, _monitoring_series, _snmp_series
+
+# Tag values that need escaping in line protocol
+NODE = "core sw,1=a"
+GROUP = "Site A"
+
+class TestLineProtocol(unittest.IsolatedAsyncioTestCase):
+
+    def test_monitoring_series_matches_point(self):
+        expected = (
+            Point("monitoring")
+            .tag("node", NODE)
+            .tag("ip", "10.0.0.1")
+            .tag("group", GROUP)
+            .tag("protocol", "icmp")
+            .field("x", 1)
+            .to_line_protocol()
+        )
+        self.assertEqual(f"{_monitoring_series(NODE, '10.0.0.1', GROUP, 'icmp')} x=1i", expected)
+
+    def test_snmp_series_matches_point(self):
+        for unit, interface in (("bps", "eth0 uplink"), (None, None)):
+            point = (
+                Point("snmp_metrics")
+                .tag("node", NODE)
+                .tag("ip", "10.0.0.1")
+                .tag("group", GROUP)
+                .tag("metric", "if=in")
+                .field("value", 5.0)
+                .tag("type", "counter")
+            )
+            if unit:
+                point.tag("unit", unit)
+            if interface:
+                point.tag("interface", interface)
+            series = _snmp_series(NODE, "10.0.0.1", GROUP, "if=in", unit, interface, "counter")
+            self.assertEqual(f"{series} value=5", point.to_line_protocol())
+
+    async def test_monitor_result_line_matches_point(self):
+        storage = Storage()
+        storage.use_influx = True
+        storage.config["logging"]["file_enabled"] = False
+        storage.writer = MagicMock()
+
+        await storage.write_monitor_results([dict(
+            node_name=NODE,
+            ip="10.0.0.1",
+            group_name=GROUP,
+            protocol="icmp",
+            latency=12.5,
+            status='say "UP"',
+            success=True,
+            raw_data={"packet_loss": 0.0, "responses": [0.0125, None]},
+            timestamp=1700000000.75
+        )])
+
+        expected = (
+            Point("monitoring")
+            .tag("node", NODE)
+            .tag("ip", "10.0.0.1")
+            .tag("group", GROUP)
+            .field("status_text", 'say "UP"')
+            .tag("protocol", "icmp")
+            .field("latency", 12.5)
+            .field("packet_loss", 0.0)
+            .field("status_code", 0)
+            .field("success", 1)
+            .field("responses", "12.5ms,timeout")
+            .time(1700000000, WritePrecision.S)
+            .to_line_protocol()
+        )
+        storage.writer.add.assert_called_once_with(expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import asyncio
+import sys
+import os
+import time
+from unittest.mock import MagicMock, AsyncMock, patch
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from monitor_manager import MonitorManager, NODE_CACHE_REFRESH
+from models import NodeDB, GroupDB
+
+def create_mock_node(node_id, name, with_group=True, interval=60):
+    node = MagicMock(spec=NodeDB)
+    node.id = node_id
+    node.name = name
+    node.ip = "192.168.1.1"
+    node.enabled = True
+    node.interval = interval
+    node.packet_count = 1
+    node.max_retries = 3
+    node.monitor_ping = True
+    node.monitor_snmp = False
+    node.snmp_community = None
+    node.snmp_port = None
+    node.node_metrics = []
+
+    if with_group:
+        group = MagicMock(spec=GroupDB)
+        group.id = "g1"
+        group.name = "TestGroup"
+        group.enabled = True
+        group.interval = 60
+        group.snmp_community = "public"
+        group.snmp_port = 161
+        node.group = group
+        node.group_id = group.id
+    else:
+        node.group = None
+        node.group_id = None
+
+    return node
+
+def create_manager(nodes):
+    """MonitorManager whose reload_nodes reads `nodes` instead of the DB"""
+    manager = MonitorManager()
+    manager.snmp_collector.start = AsyncMock()
+    manager.snmp_collector.stop = MagicMock()
+    manager._notify_worker = AsyncMock()
+    manager._storage_worker = AsyncMock()
+    db = MagicMock()
+    db.query.return_value.options.return_value.all.side_effect = lambda: list(nodes)
+    return manager, patch("monitor_manager.SessionLocal", return_value=db)
+
+class TestScheduler(unittest.IsolatedAsyncioTestCase):
+
+    def test_next_due(self):
+        manager = MonitorManager()
+        node = create_mock_node("n1", "Node1", interval=60)
+
+        # Never checked: due now
+        self.assertEqual(manager._next_due(node), 0.0)
+
+        manager.last_ping_time["n1"] = 100.0
+        self.assertEqual(manager._next_due(node), 160.0)
+
+        # PENDING nodes are retried at a third of the interval
+        manager.get_node_state("n1").status = "PENDING"
+        self.assertEqual(manager._next_due(node), 120.0)
+
+    async def test_orphan_is_not_due_again_after_check(self):
+        manager = MonitorManager()
+        node = create_mock_node("n1", "Orphan", with_group=False)
+
+        await manager.process_node(node)
+
+        self.assertGreater(manager._next_due(node), time.monotonic() + NODE_CACHE_REFRESH - 1)
+
+    async def test_run_loop_checks_orphan_once(self):
+        node = create_mock_node("n1", "Orphan", with_group=False)
+        manager, db_patch = create_manager([node])
+        manager.process_node = AsyncMock(wraps=manager.process_node)
+
+        with db_patch:
+            task = asyncio.create_task(manager.run_loop())
+            await asyncio.sleep(0.2)
+            manager.stop()
+            await asyncio.wait_for(task, timeout=1)
+
+        self.assertEqual(manager.process_node.await_count, 1)
+
+    async def test_config_change_during_check_is_applied(self):
+        old_node = create_mock_node("n1", "Node1", interval=None)
+        new_node = create_mock_node("n1", "Node1", interval=None)
+        new_node.group.interval = 10
+        nodes = [old_node]
+        manager, db_patch = create_manager(nodes)
+
+        async def process_node(node):
+            manager.last_ping_time[node.id] = time.monotonic()
+            if node is old_node:
+                # Group edited while the node is being checked
+                nodes[0] = new_node
+                manager.reload_group("g1")
+
+        manager.process_node = process_node
+
+        with db_patch:
+            task = asyncio.create_task(manager.run_loop())
+            await asyncio.sleep(0.2)
+            manager.stop()
+            await asyncio.wait_for(task, timeout=1)
+
+        self.assertIs(manager._nodes_cache["n1"], new_node)
+        self.assertEqual(manager.get_effective_config(new_node).interval, 10)
+        self.assertAlmostEqual(manager._due_at["n1"] - manager.last_ping_time["n1"], 10, delta=0.01)
+
+if __name__ == "__main__":
+    unittest.main()
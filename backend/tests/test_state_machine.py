@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from monitor_manager import next_status
+
+class TestNextStatus(unittest.TestCase):
+
+    def test_success_resets_to_up(self):
+        self.assertEqual(next_status("PENDING", True, "UP", 2, 3), ("UP", 0))
+        self.assertEqual(next_status("DOWN", True, "UP", 5, 3), ("UP", 0))
+
+    def test_metric_alert_overrides_reachability(self):
+        self.assertEqual(next_status("UP", True, "DOWN", 0, 3), ("DOWN", 0))
+        self.assertEqual(next_status("UP", True, "PENDING", 0, 3), ("PENDING", 0))
+
+    def test_failure_retries_then_down(self):
+        status, failures = next_status("UP", False, "UP", 0, 2)
+        self.assertEqual((status, failures), ("PENDING", 1))
+        status, failures = next_status(status, False, "UP", failures, 2)
+        self.assertEqual((status, failures), ("PENDING", 2))
+        status, failures = next_status(status, False, "UP", failures, 2)
+        self.assertEqual((status, failures), ("DOWN", 3))
+
+    def test_down_and_paused_are_sticky_on_failure(self):
+        self.assertEqual(next_status("DOWN", False, "UP", 3, 2), ("DOWN", 3))
+        self.assertEqual(next_status("PAUSED", False, "UP", 0, 2), ("PAUSED", 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ Trace Manager - In-memory circular buffer for state change events.
 Provides real-time streaming via SSE.
 """
 import asyncio
+import json
 import time
 import logging
 from collections import deque
@@ -11,6 +12,9 @@ from dataclasses import dataclass, asdict
 
 logger = logging.getLogger("BeamState.TraceManager")
 
+# Events buffered per SSE subscriber before its oldest ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 1024
+
 
 @dataclass
 class TraceEvent:
@@ -49,18 +53,16 @@ class TraceManager:
             self.events.append(event)
             logger.debug(f"Trace event: {event.node_name} {event.old_status} -> {event.new_status} ({event.reason})")
             
-            # Notify all subscribers
-            dead_queues = []
-            for queue in self.subscribers:
-                try:
-                    queue.put_nowait(event)
-                except asyncio.QueueFull:
-                    # Queue is full, subscriber is too slow - mark for removal
-                    dead_queues.append(queue)
+            if not self.subscribers:
+                return
             
-            # Remove dead queues
-            for q in dead_queues:
-                self.subscribers.remove(q)
+            # Serialize once; every subscriber gets the same payload
+            payload = json.dumps(event.to_dict())
+            for queue in self.subscribers:
+                if queue.full():
+                    # Subscriber is too slow - drop its oldest event rather than grow or cut it off
+                    queue.get_nowait()
+                queue.put_nowait(payload)
     
     def get_recent_events(self, limit: int = 100) -> List[dict]:
         """Get recent events as list of dicts"""
@@ -68,8 +70,8 @@ class TraceManager:
         return [e.to_dict() for e in events]
     
     async def subscribe(self) -> asyncio.Queue:
-        """Subscribe to new events, returns a queue that receives events"""
-        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        """Subscribe to new events, returns a queue that receives JSON-encoded events"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
         async with self._lock:
             self.subscribers.append(queue)
         logger.info(f"New trace subscriber. Total: {len(self.subscribers)}")
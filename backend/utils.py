@@ -1,6 +1,8 @@
 import json
 import os
 import logging
+import threading
+from typing import Optional
 from sqlalchemy.orm import Session
 from models import GroupDB, NodeDB
 
@@ -8,67 +10,120 @@ logger = logging.getLogger("BeamState.Utils")
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
 
+# Config edits arriving within this many seconds are written to disk once
+SAVE_DEBOUNCE = 0.5
+
+# Serializes read-modify-write cycles on config.json (debounced saves run on a timer thread)
+_config_file_lock = threading.Lock()
+_save_timer: Optional[threading.Timer] = None
+_save_timer_lock = threading.Lock()
+
+def _write_config_file(data: dict):
+    """Write config.json atomically so a crash mid-write can't leave a truncated file"""
+    tmp_path = CONFIG_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, CONFIG_PATH)
+
 def save_config(db: Session):
     """
     Exports the current state of the database to config.json.
     This ensures persistence across restarts.
     """
     try:
-        # 1. Read existing config to preserve app_config
-        existing_data = {}
-        if os.path.exists(CONFIG_PATH):
-            try:
-                with open(CONFIG_PATH, "r") as f:
-                    existing_data = json.load(f)
-            except Exception:
-                pass # corrupted or empty, start fresh-ish
-        
-        # Fetch all groups with their nodes
-        groups = db.query(GroupDB).all()
+        with _config_file_lock:
+            _save_config_locked(db)
+        logger.info(f"Configuration saved to {CONFIG_PATH}")
         
-        config_data = {
-            "app_config": existing_data.get("app_config", {}), # Preserve existing app_config
-            "groups": []
+    except Exception as e:
+        logger.error(f"Failed to save configuration: {e}")
+
+def _save_config_locked(db: Session):
+    """Build the groups/nodes export and write it; caller holds _config_file_lock"""
+    # 1. Read existing config to preserve app_config
+    existing_data = {}
+    if os.path.exists(CONFIG_PATH):
+        try:
+            with open(CONFIG_PATH, "r") as f:
+                existing_data = json.load(f)
+        except Exception:
+            pass # corrupted or empty, start fresh-ish
+    
+    # Fetch all groups with their nodes
+    groups = db.query(GroupDB).all()
+    
+    config_data = {
+        "app_config": existing_data.get("app_config", {}), # Preserve existing app_config
+        "groups": []
+    }
+    
+    for group in groups:
+        group_data = {
+            "id": group.id,
+            "name": group.name,
+            "interval": group.interval,
+            "packet_count": group.packet_count,
+            "max_retries": group.max_retries,
+            "enabled": group.enabled,
+            "nodes": []
         }
         
-        for group in groups:
-            group_data = {
-                "id": group.id,
-                "name": group.name,
-                "interval": group.interval,
-                "packet_count": group.packet_count,
-                "max_retries": group.max_retries,
-                "enabled": group.enabled,
-                "nodes": []
+        for node in group.nodes:
+            node_data = {
+                "id": node.id,
+                "name": node.name,
+                "ip": node.ip,
+                "interval": node.interval,
+                "packet_count": node.packet_count,
+                "max_retries": node.max_retries,
+                "enabled": node.enabled,
+                "monitor_ping": node.monitor_ping,
+                "monitor_snmp": node.monitor_snmp,
+                "snmp_community": node.snmp_community,
+                "snmp_port": node.snmp_port,
+                "notification_priority": node.notification_priority
             }
-            
-            for node in group.nodes:
-                node_data = {
-                    "id": node.id,
-                    "name": node.name,
-                    "ip": node.ip,
-                    "interval": node.interval,
-                    "packet_count": node.packet_count,
-                    "max_retries": node.max_retries,
-                    "enabled": node.enabled,
-                    "monitor_ping": node.monitor_ping,
-                    "monitor_snmp": node.monitor_snmp,
-                    "snmp_community": node.snmp_community,
-                    "snmp_port": node.snmp_port,
-                    "notification_priority": node.notification_priority
-                }
-                group_data["nodes"].append(node_data)
-            
-            config_data["groups"].append(group_data)
-            
-        # Write to file
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(config_data, f, indent=4)
-            
-        logger.info(f"Configuration saved to {CONFIG_PATH}")
+            group_data["nodes"].append(node_data)
         
-    except Exception as e:
-        logger.error(f"Failed to save configuration: {e}")
+        config_data["groups"].append(group_data)
+        
+    # Write to file
+    _write_config_file(config_data)
+
+def request_save_config():
+    """
+    Schedule save_config() on a background timer.
+    Repeated calls within SAVE_DEBOUNCE seconds collapse into a single write,
+    so bursts of edits don't each re-serialize the whole config.
+    """
+    global _save_timer
+    with _save_timer_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+        _save_timer = threading.Timer(SAVE_DEBOUNCE, _run_pending_save)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+def _run_pending_save():
+    global _save_timer
+    with _save_timer_lock:
+        _save_timer = None
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        save_config(db)
+    finally:
+        db.close()
+
+def flush_pending_config():
+    """Write a scheduled config save now instead of waiting for its timer (used at shutdown)"""
+    global _save_timer
+    with _save_timer_lock:
+        timer = _save_timer
+        _save_timer = None
+    if timer is not None:
+        timer.cancel()
+        _run_pending_save()
 
 def save_app_config(app_config: dict):
     """
@@ -108,13 +163,13 @@ def save_app_config(app_config: dict):
                     logger.warning("Invalid alert_window, defaulting to 60")
                     p_config["alert_window"] = 60
 
-        with open(CONFIG_PATH, "r") as f:
-            data = json.load(f)
+        with _config_file_lock:
+            with open(CONFIG_PATH, "r") as f:
+                data = json.load(f)
+                
+            data["app_config"] = app_config
             
-        data["app_config"] = app_config
-        
-        with open(CONFIG_PATH, "w") as f:
-            json.dump(data, f, indent=4)
+            _write_config_file(data)
             
         logger.info(f"App configuration saved to {CONFIG_PATH}")
         